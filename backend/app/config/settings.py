@@ -0,0 +1,130 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- OpenAI ---
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "whisper-1")
+GPT_MODEL = os.getenv("GPT_MODEL", "gpt-4o-mini")
+
+# Timeouts en segundos por llamada (Whisper tarda más que el chat)
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+WHISPER_TIMEOUT = float(os.getenv("WHISPER_TIMEOUT", "60"))
+GPT_TIMEOUT = float(os.getenv("GPT_TIMEOUT", "30"))
+
+# --- Subida de audio ---
+# 25 MB es el máximo que acepta la API de Whisper
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+
+# Directorio del almacén de audio "local" (solo sirve si la API y el worker comparten disco)
+VOICE_UPLOAD_DIR = os.getenv("VOICE_UPLOAD_DIR", "/tmp/linguamentor/audio")
+
+# --- Entrega del audio al worker ---
+# Clips de hasta N bytes viajan dentro del mensaje (base64); los mayores se guardan
+# en el almacén (gridfs | local) y el mensaje lleva la referencia
+AUDIO_INLINE_MAX_BYTES = int(os.getenv("AUDIO_INLINE_MAX_BYTES", str(256 * 1024)))
+AUDIO_STORE = os.getenv("AUDIO_STORE", "gridfs")
+# El worker borra el audio al procesarlo; el barrido elimina lo que quedó huérfano
+AUDIO_RETENTION_HOURS = float(os.getenv("AUDIO_RETENTION_HOURS", "24"))
+AUDIO_SWEEP_INTERVAL = float(os.getenv("AUDIO_SWEEP_INTERVAL", "3600"))
+
+# --- RabbitMQ ---
+RABBITMQ_USER = os.getenv("RABBITMQ_USER", "admin")
+RABBITMQ_PASS = os.getenv("RABBITMQ_PASS", "lingua123")
+RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "rabbitmq")
+RABBITMQ_URL = os.getenv("RABBITMQ_URL", f"amqp://{RABBITMQ_USER}:{RABBITMQ_PASS}@{RABBITMQ_HOST}/")
+RABBITMQ_CHANNEL_POOL_SIZE = int(os.getenv("RABBITMQ_CHANNEL_POOL_SIZE", "8"))
+RABBITMQ_PUBLISHER_CONFIRMS = os.getenv("RABBITMQ_PUBLISHER_CONFIRMS", "true").lower() == "true"
+
+# --- Consumidor de evaluaciones ---
+# insert_many por lotes de hasta N documentos o T milisegundos desde el primero
+EVALUATION_BATCH_SIZE = int(os.getenv("EVALUATION_BATCH_SIZE", "100"))
+EVALUATION_BATCH_MS = int(os.getenv("EVALUATION_BATCH_MS", "50"))
+
+# --- Worker de análisis de voz ---
+# jobs simultáneos por proceso (el prefetch interactivo suma VOICE_INTERACTIVE_HOLD)
+VOICE_WORKER_CONCURRENCY = int(os.getenv("VOICE_WORKER_CONCURRENCY", "8"))
+VOICE_WORKER_DRAIN_TIMEOUT = float(os.getenv("VOICE_WORKER_DRAIN_TIMEOUT", "120"))
+
+# --- Caché de transcripciones (LRU en memoria + colección Mongo con TTL) ---
+TRANSCRIPTION_CACHE_SIZE = int(os.getenv("TRANSCRIPTION_CACHE_SIZE", "1024"))
+TRANSCRIPTION_CACHE_TTL = int(os.getenv("TRANSCRIPTION_CACHE_TTL", str(30 * 24 * 3600)))
+
+# --- Caché de análisis GPT (por transcripción normalizada + versión del prompt) ---
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "4096"))
+ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", str(30 * 24 * 3600)))
+
+# --- Preprocesado de audio antes de Whisper (mono, 16 kHz, sin silencios) ---
+AUDIO_PREPROCESS = os.getenv("AUDIO_PREPROCESS", "true").lower() == "true"
+VAD_RANGE_DB = float(os.getenv("VAD_RANGE_DB", "40"))
+VAD_FLOOR_DB = float(os.getenv("VAD_FLOOR_DB", "-50"))
+
+# --- Transcripción por fragmentos de grabaciones largas ---
+TRANSCRIBE_CHUNK_SECONDS = float(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "60"))
+TRANSCRIBE_CHUNK_OVERLAP = float(os.getenv("TRANSCRIBE_CHUNK_OVERLAP", "1.5"))
+TRANSCRIBE_CHUNK_CONCURRENCY = int(os.getenv("TRANSCRIBE_CHUNK_CONCURRENCY", "4"))
+if TRANSCRIBE_CHUNK_SECONDS <= 0 or TRANSCRIBE_CHUNK_OVERLAP < 0 or TRANSCRIBE_CHUNK_CONCURRENCY < 1:
+    raise ValueError(
+        "TRANSCRIBE_CHUNK_SECONDS and TRANSCRIBE_CHUNK_CONCURRENCY must be positive "
+        "and TRANSCRIBE_CHUNK_OVERLAP non-negative"
+    )
+
+# --- Hash de contraseñas (Argon2 en un pool de procesos) ---
+# Cambiar estos valores solo afecta a los hashes nuevos: los viejos siguen verificando
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+# --- Caché de usuarios (GET /users/{id}) ---
+# Solo se invalida en el proceso que modifica al usuario: el TTL acota lo que
+# otra réplica puede servir desactualizado
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))
+# Segundo nivel compartido en Mongo (colección user_cache), desactivado por defecto
+USER_CACHE_SHARED = os.getenv("USER_CACHE_SHARED", "false").lower() == "true"
+
+# --- Importación masiva de usuarios (POST /users/bulk) ---
+BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", "10000"))
+
+# --- Exportación NDJSON (GET /users/export, GET /evaluations/export) ---
+# documentos por lote del cursor Motor; también es el tamaño de cada bloque escrito
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# --- Métricas (Prometheus) ---
+# La API las expone en GET /metrics; cada worker en su propio puerto (0 = desactivado)
+VOICE_WORKER_METRICS_PORT = int(os.getenv("VOICE_WORKER_METRICS_PORT", "9101"))
+EVALUATION_CONSUMER_METRICS_PORT = int(os.getenv("EVALUATION_CONSUMER_METRICS_PORT", "9102"))
+
+# --- Reparto justo de los jobs de voz ---
+# Dos colas: voice_analysis (interactiva) y voice_analysis_bulk (lotes). Cada
+# usuario tiene un token bucket de jobs interactivos: ráfaga de N y M por minuto;
+# lo que lo excede (y lo enviado con bulk=true) va a la cola de lotes. Sin
+# user_id la clave es la IP del cliente: detrás de Traefik uvicorn debe correr con
+# --proxy-headers, o todos los anónimos comparten el bucket de la IP del proxy
+VOICE_USER_BURST = int(os.getenv("VOICE_USER_BURST", "3"))
+VOICE_USER_RATE_PER_MIN = float(os.getenv("VOICE_USER_RATE_PER_MIN", "6"))
+# jobs de un mismo usuario en curso a la vez por worker (0 = sin tope) mientras otro
+# usuario tenga jobs esperando; sin competencia el tope no deja huecos libres
+VOICE_USER_MAX_IN_FLIGHT = int(os.getenv("VOICE_USER_MAX_IN_FLIGHT", "4"))
+# mensajes interactivos que el worker retiene además de los que corre (prefetch =
+# concurrencia + N), para ver los jobs de otros usuarios detrás de una ráfaga
+VOICE_INTERACTIVE_HOLD = int(os.getenv("VOICE_INTERACTIVE_HOLD", "16"))
+# round-robin ponderado del worker entre colas (si una está vacía la otra usa todo)
+VOICE_INTERACTIVE_WEIGHT = int(os.getenv("VOICE_INTERACTIVE_WEIGHT", "4"))
+VOICE_BULK_WEIGHT = int(os.getenv("VOICE_BULK_WEIGHT", "1"))
+# ventana de mensajes de lotes retenidos por el worker para alternar entre usuarios
+VOICE_BULK_PREFETCH = int(os.getenv("VOICE_BULK_PREFETCH", "64"))
+
+# --- Control de admisión de los endpoints de voz ---
+# POST /voice/analyze-voice: análisis simultáneos, peticiones en espera (sin leer
+# el cuerpo) y segundos máximos de espera; el resto recibe 429 con Retry-After
+VOICE_ANALYZE_CONCURRENCY = int(os.getenv("VOICE_ANALYZE_CONCURRENCY", "16"))
+VOICE_ANALYZE_MAX_WAITING = int(os.getenv("VOICE_ANALYZE_MAX_WAITING", "32"))
+VOICE_ANALYZE_MAX_WAIT = float(os.getenv("VOICE_ANALYZE_MAX_WAIT", "10"))
+# POST /voice/jobs: mensajes listos por cola (declare pasivo, leído cada TTL segundos)
+VOICE_QUEUE_MAX_DEPTH = int(os.getenv("VOICE_QUEUE_MAX_DEPTH", "500"))
+VOICE_BULK_QUEUE_MAX_DEPTH = int(os.getenv("VOICE_BULK_QUEUE_MAX_DEPTH", "5000"))
+VOICE_QUEUE_DEPTH_TTL = float(os.getenv("VOICE_QUEUE_DEPTH_TTL", "1"))
+VOICE_QUEUE_RETRY_AFTER = int(os.getenv("VOICE_QUEUE_RETRY_AFTER", "10"))
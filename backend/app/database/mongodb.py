@@ -2,6 +2,7 @@ import os
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 from app.models.user_model import User
+from app.services.metrics import mongo_command_listener
 
 
 class MongoDB:
@@ -15,7 +16,7 @@ class MongoDB:
         mongodb_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
         database_name = os.getenv("MONGODB_DB_NAME", "linguamentor")
 
-        self.client = AsyncIOMotorClient(mongodb_url)
+        self.client = AsyncIOMotorClient(mongodb_url, event_listeners=[mongo_command_listener])
         self.database = self.client[database_name]
 
         # Initialize Beanie with the User document
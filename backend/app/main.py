@@ -1,7 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST
 from contextlib import asynccontextmanager
 import logging
 from app.database.mongodb import mongodb
+from app.services.admission import AdmissionMiddleware, analyze_voice_limiter
+from app.services.audio_upload import UploadSizeLimitMiddleware
+from app.services.metrics import MetricsMiddleware, render_metrics
+from app.services.password_hashing import shutdown_pool
+from app.services.rabbitmq_utils import publisher
+from app.services.serialization import ORJSONResponse
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,11 +23,20 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to connect to MongoDB: {e}")
         raise
 
+    try:
+        await publisher.connect()
+    except Exception as e:
+        # sin RabbitMQ la API sigue atendiendo; el publisher reintenta al publicar
+        logger.error(f"Failed to connect to RabbitMQ: {e}")
+
     yield
 
     logger.info("Shutting down...")
+    await publisher.close()
+    logger.info("RabbitMQ publisher closed")
     await mongodb.close_database_connection()
     logger.info("MongoDB connection closed")
+    shutdown_pool()
 
 
 # define app first
@@ -28,13 +44,22 @@ app = FastAPI(
     title="LinguaMentor API",
     description="Intelligent Language Tutor - Backend API",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+# rechaza subidas de audio demasiado grandes antes de leer el cuerpo
+app.add_middleware(UploadSizeLimitMiddleware)
+# análisis síncronos simultáneos acotados: el exceso recibe 429 sin leer el audio
+app.add_middleware(AdmissionMiddleware, limiters={"/voice/analyze-voice": analyze_voice_limiter})
+# latencia por ruta y peticiones en curso (la más externa: mide todo lo demás)
+app.add_middleware(MetricsMiddleware)
+
 
 # import routers AFTER app is defined (evita errores por orden de ejecución)
 from app.routes import user_routes
 from app.routes import voice
+from app.routes import evaluation
 
 app.include_router(
     user_routes.router,
@@ -48,6 +73,12 @@ app.include_router(
     tags=["Voice Analysis"]
 )
 
+app.include_router(
+    evaluation.router,
+    prefix="/evaluations",
+    tags=["Evaluations"]
+)
+
 
 @app.get("/")
 async def root():
@@ -66,6 +97,12 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # formato de texto de Prometheus
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/info")
 async def api_info():
     return {
@@ -1,4 +1,5 @@
 from beanie import Document
+from pymongo import ASCENDING, IndexModel
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
 from datetime import datetime
@@ -19,7 +20,7 @@ class LanguagePreference(BaseModel):
 
 
 class User(Document):
-    email: EmailStr = Field(..., unique=True, description="User's email address")
+    email: EmailStr = Field(..., description="User's email address (unique index)")
     username: str = Field(..., min_length=3, max_length=50, description="Unique username")
     full_name: str = Field(..., min_length=1, max_length=100, description="User's full name")
     hashed_password: str = Field(..., description="Hashed password")
@@ -32,6 +33,11 @@ class User(Document):
     class Settings:
         name = "users"
         use_state_management = True
+        # Built by init_beanie; enforce uniqueness atomically in MongoDB
+        indexes = [
+            IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+            IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        ]
 
     def update_timestamp(self):
         self.updated_at = datetime.utcnow()
@@ -109,4 +115,23 @@ class UserResponse(BaseModel):
                 "created_at": "2024-01-15T10:30:00Z",
                 "updated_at": "2024-01-15T10:30:00Z"
             }
-        }
\ No newline at end of file
+        }
+
+
+class UserPage(BaseModel):
+    items: List[UserResponse]
+    next_cursor: Optional[str] = Field(default=None, description="Opaque cursor for the next page, null on the last page")
+
+
+class BulkImportRow(BaseModel):
+    index: int = Field(..., description="Position of the row in the request body")
+    status: str = Field(..., description="created, duplicate, invalid or error")
+    id: Optional[str] = None
+    email: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkImportResult(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkImportRow]
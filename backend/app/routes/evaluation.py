@@ -0,0 +1,172 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from datetime import datetime
+from app.services.evaluation_service import evaluation_service
+from app.services.export_service import NDJSON_MEDIA_TYPE, export_service
+from app.services.serialization import ORJSONResponse
+
+router = APIRouter()
+
+
+@router.get(
+    "/export",
+    summary="Export evaluations as NDJSON",
+    description="Stream the evaluations collection as one JSON object per line"
+)
+async def export_evaluations(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status: Optional[str] = None
+):
+    """
+    Streaming export of voice evaluations for analytics dumps.
+
+    - **since** / **until**: Optional `created_at` range (ISO 8601)
+    - **status**: Optional filter, e.g. `completed` or `failed`
+    """
+    return StreamingResponse(
+        export_service.export_evaluations(since=since, until=until, status=status),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": "attachment; filename=evaluations.ndjson"}
+    )
+
+
+@router.get(
+    "/traces/latency",
+    summary="Voice job latency by stage",
+    description="p50/p95 per stage of recent voice jobs, including time spent waiting in each queue"
+)
+async def get_latency_breakdown(limit: int = Query(500, ge=1, le=10000)):
+    """
+    Latency breakdown of the most recent traced voice jobs (milliseconds).
+
+    - **limit**: Number of recent jobs to include (default: 500)
+
+    Stages: `api`, `input_queue_wait`, `audio_fetch`, `whisper`, `gpt`,
+    `result_publish`, `output_queue_wait`, `batch_wait` and `end_to_end`.
+    """
+    try:
+        return ORJSONResponse(await evaluation_service.get_latency_breakdown(limit))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error computing latency breakdown: {str(e)}"
+        )
+
+
+@router.get(
+    "/users/{user_id}/history",
+    summary="Evaluation history of a user",
+    description="A user's evaluations, newest first, with cursor pagination"
+)
+async def get_history(
+    user_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    status_filter: Optional[str] = Query(None, alias="status")
+):
+    """
+    Get a user's evaluation history.
+
+    - **cursor**: Opaque `next_cursor` returned by the previous page (omit for the first page)
+    - **limit**: Maximum number of evaluations to return (default: 20)
+    - **status**: Optional filter, e.g. `completed` or `failed`
+    """
+    try:
+        page = await evaluation_service.get_history(user_id, cursor=cursor, limit=limit, status=status_filter)
+        return ORJSONResponse(page)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving evaluation history: {str(e)}"
+        )
+
+
+@router.get(
+    "/users/{user_id}/latest",
+    summary="Latest evaluation of a user",
+    description="The most recent completed evaluation of a user"
+)
+async def get_latest(user_id: str):
+    """
+    Get a user's latest completed evaluation.
+
+    - **user_id**: The unique identifier of the user
+    """
+    try:
+        evaluation = await evaluation_service.get_latest(user_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving latest evaluation: {str(e)}"
+        )
+
+    if not evaluation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No evaluations for this user"
+        )
+    return ORJSONResponse(evaluation)
+
+
+@router.get(
+    "/users/{user_id}/trends",
+    summary="Score trends of a user",
+    description="Average grammar, pronunciation and CEFR per day, week or month"
+)
+async def get_trends(
+    user_id: str,
+    bucket: str = Query("week", description="day, week or month"),
+    since: Optional[datetime] = None
+):
+    """
+    Get a user's per-skill score trends.
+
+    - **bucket**: Period of each point: `day`, `week` (ISO) or `month`
+    - **since**: Optional start of the range (ISO 8601)
+    """
+    try:
+        return ORJSONResponse(await evaluation_service.get_trends(user_id, bucket=bucket, since=since))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error computing evaluation trends: {str(e)}"
+        )
+
+
+@router.get(
+    "/users/{user_id}/progress",
+    summary="Progress dashboard of a user",
+    description="Counts, average scores, CEFR, streaks and recent daily buckets from the user's rollup"
+)
+async def get_progress(user_id: str, days: int = Query(30, ge=0, le=366)):
+    """
+    Get a user's progress rollup (a single indexed document read).
+
+    - **days**: Number of most recent daily buckets to include (default: 30)
+    """
+    try:
+        progress = await evaluation_service.get_progress(user_id, days=days)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving progress: {str(e)}"
+        )
+
+    if not progress:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No evaluations for this user"
+        )
+    return ORJSONResponse(progress)
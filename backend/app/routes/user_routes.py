@@ -1,7 +1,12 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
-from app.models.user_model import UserCreate, UserResponse
-from app.services.user_service import user_service
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from datetime import datetime
+from app.models.user_model import BulkImportResult, UserCreate, UserPage, UserResponse
+from app.services.serialization import ORJSONResponse
+from app.services.export_service import NDJSON_MEDIA_TYPE, export_service
+from app.services.user_service import parse_bulk_payload, user_service
 
 router = APIRouter()
 
@@ -25,7 +30,8 @@ async def create_user(user_data: UserCreate):
     """
     try:
         user = await user_service.create_user(user_data)
-        return user
+        # ya serializado por el servicio: se omite la revalidación de response_model
+        return ORJSONResponse(user, status_code=status.HTTP_201_CREATED)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -38,22 +44,57 @@ async def create_user(user_data: UserCreate):
         )
 
 
+@router.post(
+    "/bulk",
+    response_model=BulkImportResult,
+    summary="Import users in bulk",
+    description="Create many users from a JSON array or NDJSON body, reporting the outcome of each row"
+)
+async def bulk_create_users(request: Request):
+    """
+    Bulk user import (e.g. a school cohort).
+
+    - Body: JSON array of users, or NDJSON (`Content-Type: application/x-ndjson`)
+    - Each row has the same fields as **POST /users/**
+    - Every row is reported as `created`, `duplicate`, `invalid` or `error`
+    """
+    try:
+        body = await request.body()
+        # 10.000 filas tardan en decodificarse: fuera del event loop
+        rows = await asyncio.to_thread(parse_bulk_payload, body, request.headers.get("content-type", ""))
+        return await user_service.bulk_create_users(rows)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error importing users: {str(e)}"
+        )
+
+
 @router.get(
     "/",
-    response_model=List[UserResponse],
+    response_model=UserPage,
     summary="Get all users",
-    description="Retrieve all users with pagination"
+    description="Retrieve users with cursor pagination"
 )
-async def get_all_users(skip: int = 0, limit: int = 100):
+async def get_all_users(cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000)):
     """
-    Get all users with pagination.
+    Get users with keyset (cursor) pagination.
 
-    - **skip**: Number of users to skip (for pagination)
+    - **cursor**: Opaque `next_cursor` returned by the previous page (omit for the first page)
     - **limit**: Maximum number of users to return (default: 100)
     """
     try:
-        users = await user_service.get_all_users(skip=skip, limit=limit)
-        return users
+        return ORJSONResponse(await user_service.get_all_users(cursor=cursor, limit=limit))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -61,6 +102,33 @@ async def get_all_users(skip: int = 0, limit: int = 100):
         )
 
 
+@router.get(
+    "/export",
+    summary="Export users as NDJSON",
+    description="Stream every user (optionally created in [since, until)) as one JSON object per line"
+)
+async def export_users(since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """
+    Streaming export for analytics dumps; memory use does not grow with the collection.
+
+    - **since** / **until**: Optional `created_at` range (ISO 8601)
+    """
+    return StreamingResponse(
+        export_service.export_users(since=since, until=until),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": "attachment; filename=users.ndjson"}
+    )
+
+
+@router.get(
+    "/cache/stats",
+    summary="User cache statistics",
+    description="Hit ratio, entries and coalesced loads of the GET /users/{user_id} cache"
+)
+async def get_user_cache_stats():
+    return user_service.cache_stats()
+
+
 @router.get(
     "/{user_id}",
     response_model=UserResponse,
@@ -80,7 +148,7 @@ async def get_user_by_id(user_id: str):
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
-        return user
+        return ORJSONResponse(user)
     except HTTPException:
         raise
     except Exception as e:
@@ -1,61 +1,177 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-import os
-import tempfile
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
+from fastapi import APIRouter, UploadFile, File, Form, Header, HTTPException, Request, status
+from typing import Optional
+import openai
+from bson import ObjectId
+from app.services.admission import AdmissionRejected, analyze_voice_limiter
+from app.services.analysis_cache import analysis_cache, complete_cached
+from app.services.metrics import ADMISSION_REJECTED
+from app.services.audio_upload import AudioTooLargeError, InvalidAudioError, open_wav_upload
+from app.services.job_tracing import now_ms
+from app.services.prompts import VOICE_FEEDBACK
+from app.services.transcription_cache import transcribe_cached, transcription_cache
+from app.services.user_service import user_service
+from app.services.voice_jobs import queue_gate, voice_job_service
 
 router = APIRouter()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-@router.post("/analyze-voice")
-async def analyze_voice(file: UploadFile = File(...)):
+def _validated_upload(file: UploadFile):
     if not file.filename.endswith(".wav"):
         raise HTTPException(status_code=400, detail="El archivo debe ser .wav")
 
     try:
-        # Guardar el archivo temporal
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-            tmp.write(await file.read())
-            tmp_path = tmp.name
+        return open_wav_upload(file)
+    except AudioTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidAudioError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _check_user(user_id: str, file: UploadFile):
+    # lectura vía la caché de usuarios: no cuesta una consulta por job
+    if not ObjectId.is_valid(user_id):
+        await file.close()
+        raise HTTPException(status_code=400, detail="user_id inválido")
+    try:
+        user = await user_service.get_user_by_id(user_id)
+    except Exception as e:
+        await file.close()
+        raise HTTPException(status_code=500, detail=f"Error retrieving user: {str(e)}")
+    if not user:
+        await file.close()
+        raise HTTPException(status_code=404, detail="User not found")
+
+
+@router.post("/analyze-voice")
+async def analyze_voice(file: UploadFile = File(...)):
+    # El audio ya está en un buffer acotado (memoria/disco), se valida la cabecera
+    # y se entrega el mismo handle a Whisper sin copiarlo
+    audio = _validated_upload(file)
 
+    try:
         # Transcribir con Whisper
-        transcription = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=open(tmp_path, "rb")
-        )
+        text = await transcribe_cached(audio)
 
-        text = transcription.text
         print(f"🗣️ Transcripción: {text}")
 
-        # Analizar con GPT-4o-mini
-        prompt = f"""
-        Eres un tutor de pronunciación y gramática. Evalúa el texto siguiente:
-        '{text}'
-        Da feedback breve sobre:
-        - Errores de pronunciación probables
-        - Corrección gramatical
-        - Nivel aproximado (A1–C2)
-        """
-
-        feedback = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=200
-        )
-
-        analysis = feedback.choices[0].message.content
+        # Analizar con GPT-4o-mini (prompt versionado, con caché)
+        analysis = await complete_cached(VOICE_FEEDBACK, text)
 
         return {
             "transcription": text,
             "feedback": analysis
         }
 
+    except openai.APITimeoutError:
+        raise HTTPException(status_code=504, detail="Tiempo de espera agotado con OpenAI")
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
     finally:
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
+        await file.close()
+
+
+@router.post(
+    "/jobs",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue a voice analysis job",
+    description="Store the audio, queue it for the AI worker and return a job ID immediately"
+)
+async def create_voice_job(
+    request: Request,
+    file: UploadFile = File(...),
+    user_id: Optional[str] = Form(None),
+    bulk: bool = Form(False),
+    x_correlation_id: Optional[str] = Header(None, max_length=128),
+):
+    """
+    Queue a .wav file for asynchronous analysis.
+
+    - **user_id**: Optional owner of the attempt; it appears in the user's
+      evaluation history (**GET /evaluations/users/{user_id}/history**)
+    - **bulk**: Send batch uploads with `true`: they are processed in the
+      background lane and never delay interactive recordings. Jobs over the
+      per-user interactive rate are moved to that lane as well (see `lane`
+      in the response)
+    - **X-Correlation-ID**: Optional header to correlate the job with the
+      caller's own request; defaults to the job ID
+
+    The result is available at **GET /voice/jobs/{job_id}** once the worker
+    and the evaluation consumer have processed it. While the analysis queue
+    is full the job is refused with 429 and a `Retry-After` header.
+    """
+    received_at = now_ms()
+    if user_id is not None:
+        await _check_user(user_id, file)
+
+    filename, fileobj, _ = _validated_upload(file)
+
+    try:
+        return await voice_job_service.submit_job(
+            fileobj, filename, user_id=user_id,
+            correlation_id=x_correlation_id, received_at=received_at,
+            bulk=bulk, client_key=request.client.host if request.client else None,
+        )
+    except AdmissionRejected as e:
+        ADMISSION_REJECTED.labels("/voice/jobs", e.reason).inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Error queuing voice job: {str(e)}"
+        )
+    finally:
+        await file.close()
+
+
+@router.get(
+    "/jobs/{job_id}",
+    summary="Get voice job result",
+    description="Return the evaluation of a job, or its pending status while it is being processed"
+)
+async def get_voice_job(job_id: str):
+    """
+    Get the result of a voice analysis job.
+
+    - **job_id**: The identifier returned by POST /voice/jobs
+    """
+    try:
+        result = await voice_job_service.get_job(job_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving voice job: {str(e)}"
+        )
+
+    if not result:
+        return {"job_id": job_id, "status": "pending"}
+    return result
+
+
+@router.get(
+    "/admission/stats",
+    summary="Voice admission control statistics",
+    description="Concurrency limiter of /voice/analyze-voice and queue depth gate of /voice/jobs in this process"
+)
+async def get_admission_stats():
+    return {
+        "analyze_voice": analyze_voice_limiter.stats(),
+        "jobs": queue_gate.stats()
+    }
+
+
+@router.get(
+    "/cache/stats",
+    summary="Voice cache statistics",
+    description="Hit/miss counters and entry counts of the voice caches in this process"
+)
+async def get_cache_stats():
+    return {
+        "transcription": transcription_cache.stats(),
+        "analysis": analysis_cache.stats()
+    }
@@ -0,0 +1,198 @@
+import math
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import status
+from app.config import settings
+from app.services.metrics import ADMISSION_REJECTED
+from app.services.serialization import ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """The request is over capacity; retry after `retry_after` seconds"""
+
+    def __init__(self, detail: str, retry_after: int, reason: str = "overloaded"):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class ConcurrencyLimiter:
+    """
+    At most `limit` requests run at once and at most `max_waiting` wait for a
+    slot, each for up to `max_wait` seconds; anything beyond that is rejected
+    immediately. Retry-After is estimated from the recent service time (EWMA)
+    and the number of requests ahead.
+    """
+
+    def __init__(self, limit: int, max_waiting: int, max_wait: float):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+        self._slots = asyncio.Semaphore(limit)
+        self.running = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._service_time: Optional[float] = None
+
+    def retry_after(self) -> int:
+        service = self._service_time or 1.0
+        return max(1, math.ceil(service * (self.waiting + 1) / self.limit))
+
+    async def acquire(self):
+        if self._slots.locked():
+            if self.waiting >= self.max_waiting:
+                self.rejected += 1
+                raise AdmissionRejected("Servidor ocupado, intente más tarde", self.retry_after(), "queue_full")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.max_wait)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise AdmissionRejected("Servidor ocupado, intente más tarde", self.retry_after(), "wait_timeout")
+            finally:
+                self.waiting -= 1
+        else:
+            await self._slots.acquire()
+        self.running += 1
+        self.admitted += 1
+
+    def release(self, service_seconds: float):
+        self.running -= 1
+        # EWMA: se adapta en pocas decenas de peticiones cuando OpenAI se vuelve lento
+        if self._service_time is None:
+            self._service_time = service_seconds
+        else:
+            self._service_time += 0.2 * (service_seconds - self._service_time)
+        self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "service_time_s": round(self._service_time, 3) if self._service_time is not None else None,
+        }
+
+
+class QueueDepthGate:
+    """
+    Admission for the async path: new jobs are rejected while the ready
+    backlog of their queue is at its limit. The depth comes from
+    `depth_reader` (a passive declare) and is cached for `ttl` seconds; jobs
+    admitted since the last read are added to it, so a burst between reads
+    cannot overshoot the limit. If the broker cannot be read the gate stays
+    open and the publish itself reports the error.
+    """
+
+    def __init__(self, depth_reader: Callable[[str], Awaitable[int]], limits: Dict[str, int],
+                 ttl: float = 1.0, retry_after: int = 10):
+        self.depth_reader = depth_reader
+        self.limits = limits
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._depths: Dict[str, Tuple[int, float]] = {}
+        self._admitted_since_read: Dict[str, int] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.rejected = 0
+
+    async def _depth(self, queue: str) -> Optional[int]:
+        cached = self._depths.get(queue)
+        if cached is None or time.monotonic() - cached[1] > self.ttl:
+            # una sola lectura por cola a la vez: el resto usa el valor recién leído
+            async with self._locks.setdefault(queue, asyncio.Lock()):
+                cached = self._depths.get(queue)
+                if cached is None or time.monotonic() - cached[1] > self.ttl:
+                    try:
+                        depth = await self.depth_reader(queue)
+                    except Exception as e:
+                        logger.warning(f"Could not read the depth of {queue}: {e}")
+                        return None
+                    cached = self._depths[queue] = (depth, time.monotonic())
+                    self._admitted_since_read[queue] = 0
+        return cached[0] + self._admitted_since_read.get(queue, 0)
+
+    async def check(self, queue: str):
+        """Raise AdmissionRejected if `queue` is full, otherwise count one more job for it"""
+        limit = self.limits.get(queue)
+        if not limit:
+            return
+        depth = await self._depth(queue)
+        if depth is not None and depth >= limit:
+            self.rejected += 1
+            raise AdmissionRejected(
+                f"Cola de análisis llena ({depth} jobs pendientes), intente más tarde",
+                self.retry_after, "backlog",
+            )
+        self._admitted_since_read[queue] = self._admitted_since_read.get(queue, 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            "queues": {
+                queue: {
+                    "limit": limit,
+                    "depth": self._depths[queue][0] if queue in self._depths else None,
+                    "admitted_since_read": self._admitted_since_read.get(queue, 0),
+                }
+                for queue, limit in self.limits.items()
+            },
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware that takes a limiter slot before the route runs, so the
+    upload is not read (nor spooled to disk) until the request is admitted.
+    Rejected requests get a 429 with Retry-After right away.
+    """
+
+    def __init__(self, app, limiters: Dict[str, ConcurrencyLimiter]):
+        self.app = app
+        self.limiters = limiters
+
+    async def __call__(self, scope, receive, send):
+        limiter = self.limiters.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await limiter.acquire()
+        except AdmissionRejected as e:
+            ADMISSION_REJECTED.labels(scope["path"], e.reason).inc()
+            await self._reject(scope, receive, send, e)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - start)
+
+    async def _reject(self, scope, receive, send, error: AdmissionRejected):
+        response = ORJSONResponse(
+            {"detail": error.detail},
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            # el cuerpo no se leyó: no se reutiliza la conexión
+            headers={"Retry-After": str(error.retry_after), "Connection": "close"},
+        )
+        await response(scope, receive, send)
+
+
+# POST /voice/analyze-voice (síncrono: cada petición ocupa un análisis completo)
+analyze_voice_limiter = ConcurrencyLimiter(
+    settings.VOICE_ANALYZE_CONCURRENCY,
+    settings.VOICE_ANALYZE_MAX_WAITING,
+    settings.VOICE_ANALYZE_MAX_WAIT,
+)
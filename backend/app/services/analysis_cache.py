@@ -0,0 +1,41 @@
+import hashlib
+import re
+from app.config import settings
+from app.database.mongodb import mongodb
+from app.services import openai_client
+from app.services.cache import LRUCache, MongoCache, TieredCache
+from app.services.prompts import PromptTemplate
+
+# Conserva letras, dígitos y apóstrofes ("it's" ≠ "its"); el resto es ruido de Whisper
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+_WHITESPACE = re.compile(r"\s+")
+
+analysis_cache = TieredCache(
+    "analysis",
+    LRUCache(settings.ANALYSIS_CACHE_SIZE),
+    MongoCache("analysis_cache", settings.ANALYSIS_CACHE_TTL, lambda: mongodb.database),
+)
+
+
+def normalize_transcript(text: str) -> str:
+    """Minúsculas, sin puntuación y con espacios colapsados"""
+    text = _PUNCTUATION.sub(" ", text.casefold())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def analysis_key(prompt: PromptTemplate, text: str) -> str:
+    digest = hashlib.sha256(normalize_transcript(text).encode()).hexdigest()
+    return f"{prompt.name}:{prompt.version}:{prompt.model}:{digest}"
+
+
+async def complete_cached(prompt: PromptTemplate, text: str) -> str:
+    """Ejecuta un prompt del registro sobre una transcripción pasando por la caché"""
+    key = analysis_key(prompt, text)
+
+    content = await analysis_cache.get(key)
+    if content is not None:
+        return content
+
+    content = await openai_client.complete(prompt.render(text), model=prompt.model, **prompt.params)
+    await analysis_cache.set(key, content)
+    return content
@@ -0,0 +1,194 @@
+import io
+import wave
+import numpy as np
+from typing import List, Optional, Tuple
+from app.config import settings
+
+TARGET_RATE = 16000          # igual que record_and_send.py
+FRAME_MS = 30
+FILTER_TAPS = 127
+FFT_BLOCK = 1 << 16
+# bloques transformados por iteración: acota la memoria de las FFT (~30 MB)
+FFT_GROUP = 16
+
+
+def read_wav(data: bytes) -> Tuple[np.ndarray, int]:
+    """
+    Decode a PCM WAV into float32 samples in [-1, 1] with shape (frames, channels)
+    """
+    with wave.open(io.BytesIO(data), "rb") as w:
+        channels = w.getnchannels()
+        width = w.getsampwidth()
+        rate = w.getframerate()
+        raw = w.readframes(w.getnframes())
+
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    elif width == 3:
+        # 24 bits: se arma cada muestra con los 3 bytes y se extiende el signo
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        ints = np.where(ints & 0x800000, ints - (1 << 24), ints)
+        samples = ints.astype(np.float32) / (1 << 23)
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / (1 << 31)
+    else:
+        raise ValueError(f"Unsupported sample width: {width}")
+
+    return samples.reshape(-1, channels), rate
+
+
+def encode_wav(samples: np.ndarray, rate: int) -> bytes:
+    """
+    Encode mono float samples as 16-bit PCM WAV
+    """
+    pcm = (np.clip(samples, -1, 1) * 32767).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+def downmix(samples: np.ndarray) -> np.ndarray:
+    return samples.mean(axis=1) if samples.ndim == 2 else samples
+
+
+def _lowpass(x: np.ndarray, cutoff: float) -> np.ndarray:
+    """
+    Windowed-sinc low-pass (cutoff as a fraction of Nyquist) applied with a
+    blocked overlap-save FFT convolution, FFT_GROUP blocks at a time so peak
+    memory does not grow with the recording length.
+    """
+    n = np.arange(FILTER_TAPS) - (FILTER_TAPS - 1) / 2
+    h = cutoff * np.sinc(cutoff * n) * np.hamming(FILTER_TAPS)
+    h /= h.sum()
+    h_spectrum = np.fft.rfft(h, FFT_BLOCK)
+
+    step = FFT_BLOCK - FILTER_TAPS + 1
+    blocks = -(-len(x) // step)
+    # la salida n usa las entradas n - lead ... n + half (filtro centrado)
+    lead = FILTER_TAPS - 1 - (FILTER_TAPS - 1) // 2
+    out = np.empty(blocks * step, dtype=np.float32)
+    for first in range(0, blocks, FFT_GROUP):
+        count = min(FFT_GROUP, blocks - first)
+        start = first * step - lead
+        segment = np.zeros((count - 1) * step + FFT_BLOCK, dtype=np.float32)
+        src = x[max(0, start):start + len(segment)]
+        segment[max(0, -start):max(0, -start) + len(src)] = src
+        frames = np.lib.stride_tricks.sliding_window_view(segment, FFT_BLOCK)[::step]
+        filtered = np.fft.irfft(np.fft.rfft(frames, axis=1) * h_spectrum, FFT_BLOCK, axis=1)
+        out[first * step:(first + count) * step] = filtered[:, FILTER_TAPS - 1:].reshape(-1)
+    return out[:len(x)]
+
+
+def resample(x: np.ndarray, src_rate: int, dst_rate: int = TARGET_RATE) -> np.ndarray:
+    """
+    Resample a mono signal: anti-alias low-pass when downsampling, then linear interpolation
+    """
+    if src_rate == dst_rate or len(x) == 0:
+        return x
+    if dst_rate < src_rate:
+        x = _lowpass(x, 0.9 * dst_rate / src_rate)
+    out_len = int(round(len(x) * dst_rate / src_rate))
+    positions = np.arange(out_len) * (src_rate / dst_rate)
+    return np.interp(positions, np.arange(len(x)), x).astype(np.float32)
+
+
+def frame_energy_db(x: np.ndarray, rate: int, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """
+    RMS energy in dBFS of consecutive non-overlapping frames
+    """
+    size = max(1, rate * frame_ms // 1000)
+    count = len(x) // size
+    frames = x[:count * size].reshape(count, size)
+    rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def voiced_frames(x: np.ndarray, rate: int, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """
+    Energy VAD: a frame is voiced when it is within VAD_RANGE_DB of the loudest
+    frame and above the absolute floor VAD_FLOOR_DB
+    """
+    energy = frame_energy_db(x, rate, frame_ms)
+    if len(energy) == 0:
+        return np.zeros(0, dtype=bool)
+    threshold = max(energy.max() - settings.VAD_RANGE_DB, settings.VAD_FLOOR_DB)
+    return energy > threshold
+
+
+def trim_silence(x: np.ndarray, rate: int, padding_ms: int = 200) -> np.ndarray:
+    """
+    Cut leading and trailing silence, keeping `padding_ms` around the voiced region
+    """
+    voiced = np.flatnonzero(voiced_frames(x, rate))
+    if len(voiced) == 0:
+        return x
+    size = rate * FRAME_MS // 1000
+    pad = rate * padding_ms // 1000
+    start = max(0, voiced[0] * size - pad)
+    end = min(len(x), (voiced[-1] + 1) * size + pad)
+    return x[start:end]
+
+
+def split_on_silence(x: np.ndarray, rate: int, chunk_s: float, overlap_s: float,
+                     search_s: float = 5.0) -> List[Tuple[int, int]]:
+    """
+    Split a long signal into windows of about `chunk_s` seconds. Each cut is
+    moved to the quietest frame within `search_s` of its nominal position, and
+    windows extend `overlap_s` past the cut on both sides. Returns sample ranges.
+    """
+    size = max(1, rate * FRAME_MS // 1000)
+    energy = frame_energy_db(x, rate)
+    chunk_frames = max(1, int(chunk_s * 1000 / FRAME_MS))
+    # con fragmentos cortos la búsqueda no puede pasar del corte anterior
+    search_frames = min(int(search_s * 1000 / FRAME_MS), chunk_frames // 2)
+
+    cuts = [0]
+    nominal = chunk_frames
+    while nominal < len(energy) - search_frames:
+        lo, hi = max(0, nominal - search_frames), nominal + search_frames + 1
+        cut = lo + int(np.argmin(energy[lo:hi]))
+        cuts.append(cut * size)
+        nominal = cut + chunk_frames
+    cuts.append(len(x))
+
+    overlap = int(overlap_s * rate)
+    return [
+        (max(0, start - overlap), min(len(x), end + overlap))
+        for start, end in zip(cuts[:-1], cuts[1:])
+    ]
+
+
+def preprocess_samples(data: bytes) -> Optional[np.ndarray]:
+    """
+    Downmix, resample to 16 kHz and trim silence; None when the audio is not PCM WAV
+    """
+    try:
+        samples, rate = read_wav(data)
+    except (wave.Error, ValueError, EOFError):
+        return None
+
+    mono = resample(downmix(samples), rate, TARGET_RATE)
+    return trim_silence(mono, TARGET_RATE)
+
+
+def preprocess_wav(data: bytes, samples: Optional[np.ndarray] = None) -> bytes:
+    """
+    Downmix, resample to 16 kHz, trim silence and re-encode as 16-bit mono WAV.
+    Audio that cannot be decoded as PCM is returned unchanged. `samples` are
+    the already preprocessed samples of `data`, when the caller has them.
+    """
+    if samples is None:
+        samples = preprocess_samples(data)
+    if samples is None:
+        return data
+
+    out = encode_wav(samples, TARGET_RATE)
+    # si no hay ganancia (ya venía en 16 kHz mono sin silencios) se conserva el original
+    return out if len(out) < len(data) else data
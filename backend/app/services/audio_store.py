@@ -0,0 +1,190 @@
+import asyncio
+import os
+import shutil
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Any, BinaryIO, Callable, Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from app.config import settings
+from app.database.mongodb import mongodb
+
+logger = logging.getLogger(__name__)
+
+
+class AudioNotFoundError(Exception):
+    """The referenced audio no longer exists (already processed or swept)"""
+
+
+class LocalAudioStore:
+    """
+    Audio blobs as files in a directory. Only usable when the API and the
+    workers share that filesystem (single host or a shared volume).
+    Refs look like "local:<job_id>.wav".
+    """
+
+    scheme = "local"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, name: str) -> str:
+        # el ref viene de la cola: no se permite salir del directorio
+        return os.path.join(self.root, os.path.basename(name))
+
+    def _write(self, fileobj: BinaryIO, path: str):
+        os.makedirs(self.root, exist_ok=True)
+        with open(path, "wb") as out:
+            shutil.copyfileobj(fileobj, out, 1024 * 1024)
+
+    def _read(self, path: str) -> bytes:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise AudioNotFoundError(path)
+
+    def _sweep(self, cutoff: float) -> int:
+        removed = 0
+        if not os.path.isdir(self.root):
+            return removed
+        for entry in os.scandir(self.root):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    async def put(self, job_id: str, fileobj: BinaryIO) -> str:
+        name = f"{job_id}.wav"
+        # copia por bloques en un hilo para no bloquear el event loop
+        await asyncio.to_thread(self._write, fileobj, self._path(name))
+        return f"{self.scheme}:{name}"
+
+    async def get(self, ref: str) -> bytes:
+        return await asyncio.to_thread(self._read, self._path(ref.split(":", 1)[1]))
+
+    async def delete(self, ref: str):
+        try:
+            await asyncio.to_thread(os.remove, self._path(ref.split(":", 1)[1]))
+        except FileNotFoundError:
+            pass
+
+    async def sweep(self, older_than: timedelta) -> int:
+        return await asyncio.to_thread(self._sweep, time.time() - older_than.total_seconds())
+
+
+class GridFSAudioStore:
+    """
+    Audio blobs in a MongoDB GridFS bucket, reachable from any node that can
+    reach MongoDB. Refs look like "gridfs:<ObjectId>".
+    """
+
+    scheme = "gridfs"
+
+    def __init__(self, database_getter: Callable[[], Any], bucket_name: str = "audio"):
+        self.database_getter = database_getter
+        self.bucket_name = bucket_name
+
+    def _bucket(self) -> AsyncIOMotorGridFSBucket:
+        database = self.database_getter()
+        if database is None:
+            raise RuntimeError("MongoDB is not connected: GridFS audio store unavailable")
+        return AsyncIOMotorGridFSBucket(database, bucket_name=self.bucket_name)
+
+    @staticmethod
+    def _file_id(ref: str) -> ObjectId:
+        try:
+            return ObjectId(ref.split(":", 1)[1])
+        except (InvalidId, IndexError):
+            raise AudioNotFoundError(ref)
+
+    async def put(self, job_id: str, fileobj: BinaryIO) -> str:
+        file_id = await self._bucket().upload_from_stream(
+            f"{job_id}.wav", fileobj, metadata={"job_id": job_id}
+        )
+        return f"{self.scheme}:{file_id}"
+
+    async def get(self, ref: str) -> bytes:
+        try:
+            stream = await self._bucket().open_download_stream(self._file_id(ref))
+        except NoFile:
+            raise AudioNotFoundError(ref)
+        return await stream.read()
+
+    async def delete(self, ref: str):
+        try:
+            await self._bucket().delete(self._file_id(ref))
+        except (NoFile, AudioNotFoundError):
+            pass
+
+    async def sweep(self, older_than: timedelta) -> int:
+        bucket = self._bucket()
+        removed = 0
+        cursor = bucket.find({"uploadDate": {"$lt": datetime.utcnow() - older_than}})
+        async for grid_out in cursor:
+            try:
+                await bucket.delete(grid_out._id)
+                removed += 1
+            except NoFile:
+                pass
+        return removed
+
+
+STORES = {
+    LocalAudioStore.scheme: lambda: LocalAudioStore(settings.VOICE_UPLOAD_DIR),
+    GridFSAudioStore.scheme: lambda: GridFSAudioStore(lambda: mongodb.database),
+}
+
+_stores = {}
+
+
+def get_audio_store(scheme: Optional[str] = None):
+    """
+    Store for a scheme (default: AUDIO_STORE). Refs carry their scheme, so a
+    worker can still read audio stored before the setting changed.
+    """
+    scheme = scheme or settings.AUDIO_STORE
+    if scheme not in STORES:
+        raise ValueError(f"Unknown audio store: {scheme}")
+    if scheme not in _stores:
+        _stores[scheme] = STORES[scheme]()
+    return _stores[scheme]
+
+
+def store_for_ref(ref: str):
+    return get_audio_store(ref.split(":", 1)[0])
+
+
+async def sweep_forever(interval: float, once: bool = False):
+    """
+    Retention sweeper: deletes audio older than AUDIO_RETENTION_HOURS from the
+    configured store (jobs whose worker died before cleaning up after itself)
+    """
+    store = get_audio_store()
+    if store.scheme == GridFSAudioStore.scheme:
+        await mongodb.connect_to_database()
+    try:
+        while True:
+            removed = await store.sweep(timedelta(hours=settings.AUDIO_RETENTION_HOURS))
+            print(f"Barrido de audio ({store.scheme}): {removed} archivos eliminados")
+            if once:
+                break
+            await asyncio.sleep(interval)
+    finally:
+        await mongodb.close_database_connection()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Delete stored job audio older than AUDIO_RETENTION_HOURS")
+    parser.add_argument("--once", action="store_true", help="sweep once and exit")
+    parser.add_argument("--interval", type=float, default=settings.AUDIO_SWEEP_INTERVAL)
+    args = parser.parse_args()
+    asyncio.run(sweep_forever(args.interval, args.once))
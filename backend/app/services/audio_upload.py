@@ -0,0 +1,103 @@
+from typing import BinaryIO, Tuple
+from fastapi import HTTPException, UploadFile, status
+from app.config import settings
+
+WAV_HEADER_SIZE = 12
+
+
+class InvalidAudioError(ValueError):
+    pass
+
+
+class AudioTooLargeError(ValueError):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware that rejects oversized request bodies on the voice routes.
+
+    Requests with a Content-Length above the limit get a 413 before the body is
+    read; chunked bodies are counted while they stream and aborted as soon as
+    they cross the limit, so the multipart parser never spools more than that.
+    """
+
+    def __init__(self, app, max_bytes: int = settings.MAX_UPLOAD_BYTES, path_prefix: str = "/voice"):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                await self._reject(send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # HTTPException atraviesa el parser de FastAPI sin convertirse en 400
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=_too_large_detail(self.max_bytes)
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    async def _reject(self, send):
+        body = f'{{"detail":"{_too_large_detail(self.max_bytes)}"}}'.encode()
+        await send({
+            "type": "http.response.start",
+            "status": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def _too_large_detail(max_bytes: int) -> str:
+    return f"El archivo supera el máximo de {max_bytes / (1024 * 1024):.1f} MB"
+
+
+def check_wav_header(fileobj: BinaryIO) -> None:
+    """
+    Validate the RIFF/WAVE magic reading only the first 12 bytes, then rewind
+    """
+    header = fileobj.read(WAV_HEADER_SIZE)
+    fileobj.seek(0)
+    if len(header) < WAV_HEADER_SIZE or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        raise InvalidAudioError("El archivo no es un WAV (RIFF/WAVE) válido")
+
+
+def open_wav_upload(file: UploadFile, max_bytes: int = settings.MAX_UPLOAD_BYTES) -> Tuple[str, BinaryIO, str]:
+    """
+    Validate an uploaded WAV and return it as an OpenAI file tuple.
+
+    The upload is already spooled by the multipart parser (memory up to 1 MB,
+    disk beyond that), so the spooled handle is passed on as-is instead of
+    being copied into another temporary file.
+    """
+    size = file.size
+    if size is None:
+        size = file.file.seek(0, 2)
+        file.file.seek(0)
+
+    if size > max_bytes:
+        raise AudioTooLargeError(_too_large_detail(max_bytes))
+
+    file.file.seek(0)
+    check_wav_header(file.file)
+    return (file.filename, file.file, "audio/wav")
@@ -0,0 +1,212 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    Bounded in-process LRU cache with an optional per-entry TTL (seconds)
+    """
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+class MongoCache:
+    """
+    Shared cache tier stored in a MongoDB collection with a TTL index.
+
+    `database_getter` returns the Motor database to use, or None when the
+    process is not connected, in which case the tier is skipped silently.
+    """
+
+    def __init__(self, collection_name: str, ttl_seconds: int, database_getter: Callable[[], Any]):
+        self.collection_name = collection_name
+        self.ttl_seconds = ttl_seconds
+        self.database_getter = database_getter
+        self._indexed = False
+        self.hits = 0
+        self.misses = 0
+
+    def _collection(self):
+        database = self.database_getter()
+        if database is None:
+            return None
+        return database[self.collection_name]
+
+    async def get(self, key: str) -> Any:
+        collection = self._collection()
+        doc = await collection.find_one({"_id": key}, {"value": 1}) if collection is not None else None
+        if doc is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return doc["value"]
+
+    async def set(self, key: str, value: Any):
+        collection = self._collection()
+        if collection is None:
+            return
+        if not self._indexed:
+            await collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+            self._indexed = True
+        await collection.update_one(
+            {"_id": key},
+            {"$set": {"value": value, "created_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
+    async def delete(self, key: str):
+        collection = self._collection()
+        if collection is not None:
+            await collection.delete_one({"_id": key})
+
+    def stats(self) -> dict:
+        return {"collection": self.collection_name, "hits": self.hits, "misses": self.misses}
+
+
+class TieredCache:
+    """
+    In-process LRU in front of an optional MongoCache; hits in the shared
+    tier are promoted to memory. Errors in the shared tier are logged and
+    treated as misses so the cache never breaks the request.
+
+    `get_or_load` coalesces concurrent misses for one key into a single
+    loader call (singleflight) so a cold or just-expired entry does not
+    stampede the backing store.
+    """
+
+    def __init__(self, name: str, memory: LRUCache, shared: Optional[MongoCache] = None):
+        self.name = name
+        self.memory = memory
+        self.shared = shared
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.loads = 0
+        self.coalesced = 0
+
+    async def get(self, key: str) -> Any:
+        value = self.memory.get(key)
+        if value is not None or self.shared is None:
+            return value
+
+        try:
+            value = await self.shared.get(key)
+        except Exception as e:
+            logger.warning(f"Cache {self.name}: shared tier read failed: {e}")
+            return None
+
+        if value is not None:
+            self.memory.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any):
+        self.memory.set(key, value)
+        if self.shared is None:
+            return
+        try:
+            await self.shared.set(key, value)
+        except Exception as e:
+            logger.warning(f"Cache {self.name}: shared tier write failed: {e}")
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value or run `loader` once for all concurrent callers.
+        None results are not cached. The load runs in its own task, so a caller
+        that is cancelled does not cancel it for the others.
+        """
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader))
+            # evita el aviso "exception was never retrieved" si nadie queda esperando
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+            self.loads += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        task = asyncio.current_task()
+        try:
+            value = await loader()
+            # si se invalidó la clave durante la carga, el valor ya puede estar viejo
+            if value is not None and self._inflight.get(key) is task:
+                await self.set(key, value)
+            return value
+        finally:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+
+    async def invalidate(self, key: str):
+        """
+        Drop a key from both tiers and detach any load in flight for it
+        """
+        self.memory.delete(key)
+        self._inflight.pop(key, None)
+        if self.shared is None:
+            return
+        try:
+            await self.shared.delete(key)
+        except Exception as e:
+            logger.warning(f"Cache {self.name}: shared tier delete failed: {e}")
+
+    def stats(self) -> dict:
+        stats = {"memory": self.memory.stats(), "loads": self.loads, "coalesced": self.coalesced}
+        if self.shared is not None:
+            stats["shared"] = self.shared.stats()
+        return stats
@@ -0,0 +1,73 @@
+import asyncio
+import re
+from typing import List
+import numpy as np
+from app.config import settings
+from app.services import openai_client
+from app.services.audio_preprocessing import TARGET_RATE, encode_wav, split_on_silence
+
+MAX_OVERLAP_WORDS = 30
+_NON_WORD = re.compile(r"[^\w']+")
+
+
+def _normalize_word(word: str) -> str:
+    return _NON_WORD.sub("", word.casefold())
+
+
+def stitch_transcripts(texts: List[str]) -> str:
+    """
+    Join chunk transcripts in order, dropping the words repeated at each overlap:
+    the longest suffix of the text so far that matches a prefix of the next chunk
+    (compared without case and punctuation) is kept only once.
+    """
+    words: List[str] = []
+    for text in texts:
+        chunk = text.split()
+        if not words:
+            words = chunk
+            continue
+
+        tail = [_normalize_word(w) for w in words[-MAX_OVERLAP_WORDS:]]
+        head = [_normalize_word(w) for w in chunk[:MAX_OVERLAP_WORDS]]
+        overlap = 0
+        for size in range(min(len(tail), len(head)), 0, -1):
+            if tail[-size:] == head[:size]:
+                overlap = size
+                break
+        words.extend(chunk[overlap:])
+    return " ".join(words)
+
+
+def needs_chunking(samples: np.ndarray) -> bool:
+    """True when preprocessed 16 kHz samples are long enough to be split"""
+    return len(samples) > settings.TRANSCRIBE_CHUNK_SECONDS * TARGET_RATE * 1.5
+
+
+async def transcribe_samples(samples: np.ndarray, model: str = settings.WHISPER_MODEL) -> str:
+    """
+    Transcribe preprocessed 16 kHz mono samples. Recordings longer than
+    TRANSCRIBE_CHUNK_SECONDS are split at silences into overlapping windows
+    that are transcribed concurrently (at most TRANSCRIBE_CHUNK_CONCURRENCY at
+    a time) and stitched back in order, so wall-clock time follows the chunk
+    length instead of the recording length.
+    """
+    if not needs_chunking(samples):
+        data = await asyncio.to_thread(encode_wav, samples, TARGET_RATE)
+        return await openai_client.transcribe(("audio.wav", data, "audio/wav"), model=model)
+
+    windows = split_on_silence(
+        samples, TARGET_RATE,
+        chunk_s=settings.TRANSCRIBE_CHUNK_SECONDS,
+        overlap_s=settings.TRANSCRIBE_CHUNK_OVERLAP,
+    )
+    semaphore = asyncio.Semaphore(settings.TRANSCRIBE_CHUNK_CONCURRENCY)
+
+    async def transcribe_window(index: int, start: int, end: int) -> str:
+        async with semaphore:
+            data = await asyncio.to_thread(encode_wav, samples[start:end], TARGET_RATE)
+            return await openai_client.transcribe((f"chunk_{index}.wav", data, "audio/wav"), model=model)
+
+    texts = await asyncio.gather(*(
+        transcribe_window(i, start, end) for i, (start, end) in enumerate(windows)
+    ))
+    return stitch_transcripts(texts)
@@ -1,9 +1,16 @@
 import os
 import json
+import time
 import asyncio
 import aio_pika
+from typing import List, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
 from datetime import datetime
+from app.config import settings
+from app.services.job_tracing import now_ms, read_trace
+from app.services.metrics import CONSUMER_PROCESSING_DURATION, QUEUE_CONSUMED, mongo_command_listener, start_metrics_server
+from app.services.progress_rollup import PROGRESS_COLLECTION, apply_rollups
 
 RABBITMQ_USER = os.getenv("RABBITMQ_USER", "admin")
 RABBITMQ_PASS = os.getenv("RABBITMQ_PASS", "lingua123")
@@ -13,30 +20,166 @@ QUEUE_OUTPUT = "feedback_ready"
 MONGO_URL = os.getenv("MONGODB_URL", "mongodb://mongo:27017")
 MONGO_DB = os.getenv("MONGODB_DB_NAME", "linguamentor")
 
-async def save_to_mongo(doc: dict):
-    client = AsyncIOMotorClient(MONGO_URL)
-    db = client[MONGO_DB]
-    collection = db["evaluations"]
-    doc["created_at"] = datetime.utcnow()
-    await collection.insert_one(doc)
-    client.close()
-    print("Documento guardado.")
+DUPLICATE_KEY = 11000
+
+# Un único cliente Motor por proceso (con su pool de conexiones)
+_client: Optional[AsyncIOMotorClient] = None
+
+
+def get_collection():
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(MONGO_URL, event_listeners=[mongo_command_listener])
+    return _client[MONGO_DB]["evaluations"]
+
+
+def get_progress_collection():
+    return get_collection().database[PROGRESS_COLLECTION]
+
+
+def close_client():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+async def ensure_indexes():
+    # job_id único: una reentrega del mismo resultado no duplica la evaluación
+    await get_collection().create_index(
+        "job_id",
+        unique=True,
+        partialFilterExpression={"job_id": {"$type": "string"}},
+    )
+    # historial por usuario (más reciente primero); _id desempata la paginación
+    await get_collection().create_index(
+        [("user_id", 1), ("created_at", -1), ("_id", -1)],
+        name="user_id_created_at",
+    )
+    # jobs recientes de todos los usuarios (desglose de latencia, python -m app.services.job_tracing)
+    await get_collection().create_index([("created_at", -1)], name="created_at")
+
+
+class BatchWriter:
+    """
+    Micro-batching writer for the evaluations collection (and the
+    user_progress rollups of the newly stored evaluations).
+
+    Documents are buffered with their RabbitMQ message and written with an
+    unordered insert_many once `max_items` accumulate or `max_delay_ms` pass
+    since the first one. Messages are acked only after their document is
+    durably written (duplicates of an already stored job count as written),
+    so a crash before the flush means redelivery, never loss.
+    """
+
+    def __init__(self, max_items: int = settings.EVALUATION_BATCH_SIZE,
+                 max_delay_ms: int = settings.EVALUATION_BATCH_MS):
+        self.max_items = max_items
+        self.max_delay = max_delay_ms / 1000
+        self._pending: List[Tuple[dict, aio_pika.abc.AbstractIncomingMessage]] = []
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+
+    async def add(self, doc: dict, message):
+        self._pending.append((doc, message))
+        if len(self._pending) >= self.max_items:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.max_delay)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            if self._timer is not None and self._timer is not asyncio.current_task():
+                self._timer.cancel()
+                self._timer = None
+
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            start = time.perf_counter()
+
+            # la marca "stored" se toma al escribir el lote: cubre la espera del micro-batch
+            stored_at = now_ms()
+            for doc, _ in batch:
+                if "trace" in doc:
+                    doc["trace"]["stages"]["stored"] = stored_at
+
+            failed, duplicates = set(), set()
+            try:
+                await get_collection().insert_many([doc for doc, _ in batch], ordered=False)
+            except BulkWriteError as e:
+                for err in e.details.get("writeErrors", []):
+                    (duplicates if err.get("code") == DUPLICATE_KEY else failed).add(err["index"])
+            except Exception as e:
+                # error transitorio (red, primario caído): se reencola todo el lote
+                print("Error guardando lote en la Base de Datos:", e)
+                for _, message in batch:
+                    await message.nack(requeue=True)
+                QUEUE_CONSUMED.labels(QUEUE_OUTPUT, "requeued").inc(len(batch))
+                CONSUMER_PROCESSING_DURATION.labels("evaluation_consumer").observe(time.perf_counter() - start)
+                return
+
+            # solo las evaluaciones nuevas suman al rollup: una reentrega (duplicado) ya se contó
+            skipped = failed | duplicates
+            inserted = [doc for index, (doc, _) in enumerate(batch) if index not in skipped]
+            try:
+                await apply_rollups(get_progress_collection(), inserted)
+            except Exception as e:
+                # las evaluaciones ya son durables: no se reencolan, el rollup se corrige con
+                # python -m app.services.progress_rollup
+                print("Error actualizando user_progress:", e)
+
+            for index, (_, message) in enumerate(batch):
+                if index in failed:
+                    # el documento en sí es inválido, reintentarlo fallaría igual
+                    await message.nack(requeue=False)
+                else:
+                    await message.ack()
+
+            QUEUE_CONSUMED.labels(QUEUE_OUTPUT, "stored").inc(len(batch) - len(failed) - len(duplicates))
+            QUEUE_CONSUMED.labels(QUEUE_OUTPUT, "duplicate").inc(len(duplicates))
+            QUEUE_CONSUMED.labels(QUEUE_OUTPUT, "rejected").inc(len(failed))
+            # una unidad de trabajo del consumidor es un lote (insert_many + rollups + acks)
+            CONSUMER_PROCESSING_DURATION.labels("evaluation_consumer").observe(time.perf_counter() - start)
+            print(f"Lote guardado: {len(batch) - len(failed)} documentos, {len(failed)} descartados.")
+
 
 async def consume():
+    start_metrics_server(settings.EVALUATION_CONSUMER_METRICS_PORT)
+    await ensure_indexes()
+    writer = BatchWriter()
     connection = await aio_pika.connect_robust(f"amqp://{RABBITMQ_USER}:{RABBITMQ_PASS}@{RABBITMQ_HOST}/")
     async with connection:
         channel = await connection.channel()
+        # el prefetch debe cubrir al menos un lote completo sin ack
+        await channel.set_qos(prefetch_count=writer.max_items * 2)
         await channel.declare_queue(QUEUE_OUTPUT, durable=True)
         print("Evaluacion: escuchando cola", QUEUE_OUTPUT)
         queue = await channel.get_queue(QUEUE_OUTPUT)
-        async with queue.iterator() as it:
-            async for message in it:
-                async with message.process():
-                    data = json.loads(message.body)
+        try:
+            async with queue.iterator() as it:
+                async for message in it:
                     try:
-                        await save_to_mongo(data)
+                        data = json.loads(message.body)
                     except Exception as e:
-                        print("Error guardando en la Base de Datos:", e)
+                        print("Mensaje inválido descartado:", e)
+                        await message.reject(requeue=False)
+                        QUEUE_CONSUMED.labels(QUEUE_OUTPUT, "invalid").inc()
+                        continue
+                    data["created_at"] = datetime.utcnow()
+                    correlation_id, stamps = read_trace(message.headers)
+                    if stamps:
+                        stamps["consumer_received"] = now_ms()
+                        data["trace"] = {"correlation_id": correlation_id or data.get("job_id"), "stages": stamps}
+                    await writer.add(data, message)
+        finally:
+            await writer.flush()
+            close_client()
 
 if __name__ == "__main__":
     asyncio.run(consume())
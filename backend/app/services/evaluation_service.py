@@ -0,0 +1,211 @@
+import base64
+import binascii
+import struct
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from app.database.mongodb import mongodb
+from app.services.job_tracing import latency_breakdown
+from app.services.progress_rollup import PROGRESS_COLLECTION, current_streak
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+# Todas las consultas empiezan por user_id y ordenan por created_at: usan el
+# índice user_id_created_at que crea evaluation_consumer.ensure_indexes
+HISTORY_SORT = [("created_at", -1), ("_id", -1)]
+
+TREND_BUCKETS = {
+    "day": "%Y-%m-%d",
+    "week": "%G-W%V",
+    "month": "%Y-%m",
+}
+
+# Escala numérica para promediar el nivel CEFR
+CEFR_LEVELS = {"A1": 1, "A2": 2, "B1": 3, "B2": 4, "C1": 5, "C2": 6}
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def encode_history_cursor(created_at: datetime, object_id: ObjectId) -> str:
+    # Mongo guarda fechas UTC sin zona con precisión de milisegundos
+    millis = (created_at - EPOCH) // timedelta(milliseconds=1)
+    raw = struct.pack(">q", millis) + object_id.binary
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        if len(raw) != 20:
+            raise ValueError
+        (millis,) = struct.unpack(">q", raw[:8])
+        return EPOCH + timedelta(milliseconds=millis), ObjectId(raw[8:])
+    except (binascii.Error, InvalidId, TypeError, ValueError, struct.error):
+        raise ValueError("Invalid pagination cursor")
+
+
+def _cefr_score():
+    return {"$switch": {
+        "branches": [
+            {"case": {"$eq": [{"$toUpper": {"$ifNull": ["$analysis.cefr", ""]}}, level]}, "then": score}
+            for level, score in CEFR_LEVELS.items()
+        ],
+        "default": None,
+    }}
+
+
+class EvaluationService:
+    @staticmethod
+    def _collection():
+        return mongodb.database["evaluations"]
+
+    @staticmethod
+    async def get_history(user_id: str, cursor: Optional[str] = None, limit: int = 20,
+                          status: Optional[str] = None) -> dict:
+        """
+        A user's evaluations, newest first, with keyset pagination on
+        (created_at, _id) so every page is a bounded index range scan
+        """
+        try:
+            query = {"user_id": user_id}
+            if cursor:
+                created_at, object_id = decode_history_cursor(cursor)
+                query["$or"] = [
+                    {"created_at": {"$lt": created_at}},
+                    {"created_at": created_at, "_id": {"$lt": object_id}},
+                ]
+            if status:
+                query["status"] = status
+
+            docs = await EvaluationService._collection().find(query).sort(HISTORY_SORT) \
+                .limit(limit + 1).to_list(length=limit + 1)
+
+            has_more = len(docs) > limit
+            docs = docs[:limit]
+            next_cursor = encode_history_cursor(docs[-1]["created_at"], docs[-1]["_id"]) if has_more else None
+            return {"items": docs, "next_cursor": next_cursor}
+        except Exception as e:
+            logger.error(f"Error getting evaluation history for {user_id}: {str(e)}")
+            raise
+
+    @staticmethod
+    async def get_latest(user_id: str) -> Optional[dict]:
+        """
+        The most recent completed evaluation of a user
+        """
+        try:
+            return await EvaluationService._collection().find_one(
+                {"user_id": user_id, "status": "completed"},
+                sort=HISTORY_SORT
+            )
+        except Exception as e:
+            logger.error(f"Error getting latest evaluation for {user_id}: {str(e)}")
+            raise
+
+    @staticmethod
+    async def get_trends(user_id: str, bucket: str = "week", since: Optional[datetime] = None) -> dict:
+        """
+        Per-period averages of grammar_score, pron_score and CEFR (A1=1 ... C2=6)
+        over a user's completed evaluations, plus the last CEFR of each period
+        """
+        if bucket not in TREND_BUCKETS:
+            raise ValueError(f"bucket must be one of: {', '.join(TREND_BUCKETS)}")
+
+        match = {"user_id": user_id, "status": "completed"}
+        if since:
+            match["created_at"] = {"$gte": since}
+
+        pipeline = [
+            {"$match": match},
+            # orden del índice (invertido): $last del grupo es la evaluación más reciente
+            {"$sort": {"created_at": 1}},
+            {"$group": {
+                "_id": {"$dateToString": {"format": TREND_BUCKETS[bucket], "date": "$created_at"}},
+                "evaluations": {"$sum": 1},
+                "grammar_score": {"$avg": "$analysis.grammar_score"},
+                "pron_score": {"$avg": "$analysis.pron_score"},
+                "cefr_score": {"$avg": _cefr_score()},
+                "last_cefr": {"$last": "$analysis.cefr"},
+                "first_at": {"$first": "$created_at"},
+            }},
+            {"$sort": {"first_at": 1}},
+            {"$project": {
+                "_id": 0,
+                "period": "$_id",
+                "evaluations": 1,
+                "grammar_score": {"$round": ["$grammar_score", 1]},
+                "pron_score": {"$round": ["$pron_score", 1]},
+                "cefr_score": {"$round": ["$cefr_score", 2]},
+                "last_cefr": 1,
+            }},
+        ]
+
+        try:
+            points = await EvaluationService._collection().aggregate(pipeline).to_list(length=None)
+            return {"user_id": user_id, "bucket": bucket, "points": points}
+        except Exception as e:
+            logger.error(f"Error computing evaluation trends for {user_id}: {str(e)}")
+            raise
+
+    @staticmethod
+    async def get_progress(user_id: str, days: int = 30) -> Optional[dict]:
+        """
+        A user's progress rollup (maintained by evaluation_consumer): a single
+        fetch by _id, with averages derived from the running sums and only the
+        last `days` daily buckets
+        """
+        try:
+            rollup = await mongodb.database[PROGRESS_COLLECTION].find_one({"_id": user_id})
+        except Exception as e:
+            logger.error(f"Error getting progress for {user_id}: {str(e)}")
+            raise
+        if rollup is None:
+            return None
+
+        def average(total, count):
+            return round(total / count, 1) if count else None
+
+        recent = sorted(rollup.get("days", {}).items())[-days:] if days else []
+        return {
+            "user_id": rollup.pop("_id"),
+            "evaluations": rollup.get("evaluations", 0),
+            "failed_evaluations": rollup.get("failed_evaluations", 0),
+            "grammar_score": average(rollup.get("grammar_sum", 0), rollup.get("grammar_count", 0)),
+            "pron_score": average(rollup.get("pron_sum", 0), rollup.get("pron_count", 0)),
+            "last_cefr": rollup.get("last_cefr"),
+            "cefr_counts": rollup.get("cefr_counts", {}),
+            "current_streak": current_streak(rollup),
+            "longest_streak": rollup.get("longest_streak", 0),
+            "last_active_day": rollup.get("last_active_day"),
+            "first_evaluation_at": rollup.get("first_evaluation_at"),
+            "last_evaluation_at": rollup.get("last_evaluation_at"),
+            "days": [
+                {
+                    "day": day,
+                    "evaluations": bucket.get("evaluations", 0),
+                    "grammar_score": average(bucket.get("grammar_sum", 0), bucket.get("grammar_count", 0)),
+                    "pron_score": average(bucket.get("pron_sum", 0), bucket.get("pron_count", 0)),
+                }
+                for day, bucket in recent
+            ],
+        }
+
+    @staticmethod
+    async def get_latency_breakdown(limit: int = 500) -> dict:
+        """
+        Per-stage latency (API, queue waits, Whisper, GPT, batching) of the
+        `limit` most recent traced jobs
+        """
+        try:
+            return await latency_breakdown(EvaluationService._collection(), limit)
+        except Exception as e:
+            logger.error(f"Error computing job latency breakdown: {str(e)}")
+            raise
+
+
+# Global service instance
+evaluation_service = EvaluationService()
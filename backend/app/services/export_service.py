@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import AsyncIterator, Optional
+from app.config import settings
+from app.database.mongodb import mongodb
+from app.models.user_model import User
+from app.services.serialization import dumps_line
+from app.services.user_service import USER_RESPONSE_PROJECTION
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def stream_ndjson(cursor, name: str) -> AsyncIterator[bytes]:
+    """
+    Drain a Motor cursor one batch at a time, yielding each batch as a single
+    NDJSON chunk: memory stays bounded by EXPORT_BATCH_SIZE whatever the
+    collection size
+    """
+    rows = 0
+    try:
+        while True:
+            docs = await cursor.to_list(length=settings.EXPORT_BATCH_SIZE)
+            if not docs:
+                break
+            rows += len(docs)
+            yield b"".join(dumps_line(doc) for doc in docs)
+    except Exception as e:
+        # el status 200 ya se envió: solo queda cortar el stream y registrarlo
+        logger.error(f"Error exporting {name} after {rows} rows: {str(e)}")
+        raise
+    finally:
+        await cursor.close()
+    logger.info(f"Exported {rows} {name}")
+
+
+def _created_at_range(since: Optional[datetime], until: Optional[datetime]) -> dict:
+    created_at = {}
+    if since:
+        created_at["$gte"] = since
+    if until:
+        created_at["$lt"] = until
+    return {"created_at": created_at} if created_at else {}
+
+
+class ExportService:
+    @staticmethod
+    def export_users(since: Optional[datetime] = None, until: Optional[datetime] = None) -> AsyncIterator[bytes]:
+        """
+        Users as NDJSON in _id order, with the same fields as UserResponse
+        """
+        cursor = User.get_motor_collection().find(
+            _created_at_range(since, until), USER_RESPONSE_PROJECTION
+        ).sort("_id", 1).batch_size(settings.EXPORT_BATCH_SIZE)
+        return stream_ndjson(cursor, "users")
+
+    @staticmethod
+    def export_evaluations(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                           status: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        Evaluations as NDJSON in _id order, optionally filtered by status and created_at
+        """
+        query = _created_at_range(since, until)
+        if status:
+            query["status"] = status
+        cursor = mongodb.database["evaluations"].find(query).sort("_id", 1).batch_size(settings.EXPORT_BATCH_SIZE)
+        return stream_ndjson(cursor, "evaluations")
+
+
+# Global service instance
+export_service = ExportService()
@@ -0,0 +1,154 @@
+import time
+import asyncio
+import itertools
+from collections import Counter, OrderedDict, deque
+from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple
+
+# header AMQP con la clave de reparto del job (user_id o cliente)
+FAIR_KEY_HEADER = "x-fair-key"
+
+
+class TokenBuckets:
+    """
+    One token bucket per key (user or client): `burst` tokens, refilled at
+    `rate_per_min`. Bounded like LRUCache; an evicted key simply starts
+    again with a full bucket.
+    """
+
+    def __init__(self, burst: int, rate_per_min: float, max_keys: int = 100_000):
+        self.burst = burst
+        self.rate = rate_per_min / 60
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+
+    def _tokens(self, key: Hashable, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        return min(self.burst, tokens + (now - updated) * self.rate)
+
+    def try_take(self, key: Hashable) -> bool:
+        """Take one token if available; False means the key is over its rate"""
+        now = time.monotonic()
+        tokens = self._tokens(key, now)
+        taken = tokens >= 1
+        self._buckets[key] = (tokens - 1 if taken else tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return taken
+
+    def refund(self, key: Hashable):
+        """Give back a token taken for a job that was not accepted after all"""
+        if key in self._buckets:
+            tokens, updated = self._buckets[key]
+            self._buckets[key] = (min(self.burst, tokens + 1), updated)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class _Lane:
+    def __init__(self, name: str, weight: int):
+        self.name = name
+        self.weight = weight
+        self.current = 0
+        # mensajes retenidos por clave, en orden de llegada: (secuencia, mensaje)
+        self.pending: Dict[Hashable, Deque[Tuple[int, Any]]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.pending)
+
+
+class LaneScheduler:
+    """
+    Dispatch order of the messages a worker holds from several queues (lanes).
+
+    Lanes are picked by smooth weighted round-robin among the non-empty ones,
+    so an empty lane gives its share to the others. Within a lane the next
+    message belongs to the key (user) with the fewest jobs in flight, oldest
+    first on ties, so one user's burst alternates with everyone else's jobs.
+    A key with `max_in_flight` jobs running (0 = no cap) is skipped while
+    another key has a message ready; with nothing else to run the cap is
+    ignored, so it never leaves a worker idle.
+    """
+
+    def __init__(self, weights: Dict[str, int], max_in_flight: int = 0):
+        self.lanes = {name: _Lane(name, weight) for name, weight in weights.items()}
+        self.max_in_flight = max_in_flight
+        self.in_flight: Counter = Counter()
+        self._seq = itertools.count()
+        self._ready = asyncio.Event()
+
+    def put(self, lane: str, key: Hashable, message: Any):
+        self.lanes[lane].pending.setdefault(key, deque()).append((next(self._seq), message))
+        self._ready.set()
+
+    def _eligible(self, lane: _Lane, capped: bool) -> List[Hashable]:
+        if not (capped and self.max_in_flight):
+            return list(lane.pending)
+        return [key for key in lane.pending if self.in_flight[key] < self.max_in_flight]
+
+    def _active(self, capped: bool) -> List[Tuple[_Lane, List[Hashable]]]:
+        active = []
+        for lane in self.lanes.values():
+            keys = self._eligible(lane, capped)
+            if keys:
+                active.append((lane, keys))
+        return active
+
+    def _pick_lane(self) -> Optional[Tuple[_Lane, List[Hashable]]]:
+        # las claves en el tope solo ceden su turno si hay otra lista para correr
+        active = self._active(capped=True) or self._active(capped=False)
+        if not active:
+            return None
+        for lane in self.lanes.values():
+            if all(lane is not other for other, _ in active):
+                # una cola vacía (o solo con claves en el tope) no acumula crédito para después
+                lane.current = 0
+        for lane, _ in active:
+            lane.current += lane.weight
+        chosen = max(active, key=lambda item: item[0].current)
+        chosen[0].current -= sum(lane.weight for lane, _ in active)
+        return chosen
+
+    def _pop(self, lane: _Lane, keys: List[Hashable]) -> Tuple[Hashable, Any]:
+        key = min(keys, key=lambda k: (self.in_flight[k], lane.pending[k][0][0]))
+        queue = lane.pending[key]
+        _, message = queue.popleft()
+        if not queue:
+            del lane.pending[key]
+        self.in_flight[key] += 1
+        return key, message
+
+    async def next(self) -> Tuple[str, Hashable, Any]:
+        """Wait for a held message and return (lane, key, message); call done(key) when it finishes"""
+        while True:
+            picked = self._pick_lane()
+            if picked is not None:
+                lane, keys = picked
+                key, message = self._pop(lane, keys)
+                return lane.name, key, message
+            self._ready.clear()
+            await self._ready.wait()
+
+    def done(self, key: Hashable):
+        self.in_flight[key] -= 1
+        if self.in_flight[key] <= 0:
+            del self.in_flight[key]
+        # una clave que estaba en el tope puede tener mensajes retenidos
+        self._ready.set()
+
+    def drain(self) -> List[Any]:
+        """Remove and return every held message that was not dispatched"""
+        messages = []
+        for lane in self.lanes.values():
+            for queue in lane.pending.values():
+                messages.extend(message for _, message in queue)
+            lane.pending.clear()
+        return messages
+
+    def stats(self) -> dict:
+        return {
+            "held": {name: sum(len(q) for q in lane.pending.values()) for name, lane in self.lanes.items()},
+            "keys_in_flight": len(self.in_flight),
+            "keys_at_cap": sum(1 for n in self.in_flight.values() if self.max_in_flight and n >= self.max_in_flight),
+        }
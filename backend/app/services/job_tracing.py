@@ -0,0 +1,123 @@
+"""
+Trazas de los jobs de voz: API -> voice_analysis -> worker -> feedback_ready -> consumidor -> Mongo.
+
+Cada salto agrega su marca de tiempo (epoch en milisegundos, enteros: los float
+de AMQP pierden precisión) al header "x-trace" del mensaje, y el consumidor
+guarda el resultado en evaluation["trace"] junto con el correlation_id.
+
+Desglose de latencia de los jobs recientes:
+
+    python -m app.services.job_tracing --limit 500
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+CORRELATION_HEADER = "x-correlation-id"
+TRACE_HEADER = "x-trace"
+
+# (etapa, marca inicial, marca final) en el orden del recorrido
+STAGES = [
+    ("api", "api_received", "api_published"),
+    ("input_queue_wait", "api_published", "worker_started"),
+    ("audio_fetch", "worker_started", "audio_fetched"),
+    ("whisper", "audio_fetched", "transcribed"),
+    ("gpt", "transcribed", "analyzed"),
+    ("result_publish", "analyzed", "worker_published"),
+    ("output_queue_wait", "worker_published", "consumer_received"),
+    ("batch_wait", "consumer_received", "stored"),
+    ("end_to_end", "api_received", "stored"),
+]
+
+
+def now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+def trace_headers(correlation_id: str, stamps: Dict[str, int]) -> dict:
+    return {CORRELATION_HEADER: correlation_id, TRACE_HEADER: dict(stamps)}
+
+
+def read_trace(headers: Optional[dict]) -> Tuple[Optional[str], Dict[str, int]]:
+    """
+    Correlation ID and stage timestamps of an incoming message. aio-pika
+    delivers the x-trace dict as JSON bytes, so both forms are accepted;
+    messages published before tracing existed simply have none
+    """
+    headers = headers or {}
+    correlation_id = headers.get(CORRELATION_HEADER)
+    if isinstance(correlation_id, (bytes, bytearray)):
+        correlation_id = correlation_id.decode()
+    stamps = headers.get(TRACE_HEADER)
+    # aio-pika codifica los diccionarios de los headers como JSON (byte array)
+    if isinstance(stamps, (str, bytes, bytearray)):
+        try:
+            stamps = json.loads(stamps)
+        except ValueError:
+            stamps = None
+    return correlation_id, {k: int(v) for k, v in stamps.items()} if isinstance(stamps, dict) else {}
+
+
+def stage_durations(stamps: Dict[str, int]) -> Dict[str, int]:
+    """Milliseconds per stage, only for stages whose both ends were stamped"""
+    return {
+        name: stamps[end] - stamps[begin]
+        for name, begin, end in STAGES
+        if begin in stamps and end in stamps
+    }
+
+
+def summarize(traces: List[Dict[str, int]]) -> dict:
+    """
+    Per-stage count, mean, p50, p95 and max (milliseconds) over many jobs
+    """
+    per_stage: Dict[str, List[int]] = {name: [] for name, _, _ in STAGES}
+    for stamps in traces:
+        for name, value in stage_durations(stamps).items():
+            per_stage[name].append(value)
+
+    summary = {}
+    for name, values in per_stage.items():
+        if not values:
+            continue
+        arr = np.asarray(values)
+        summary[name] = {
+            "count": len(values),
+            "mean_ms": round(float(arr.mean()), 1),
+            "p50_ms": round(float(np.percentile(arr, 50)), 1),
+            "p95_ms": round(float(np.percentile(arr, 95)), 1),
+            "max_ms": int(arr.max()),
+        }
+    return summary
+
+
+async def latency_breakdown(evaluations_collection, limit: int = 500) -> dict:
+    """
+    Latency by stage over the `limit` most recent traced evaluations
+    (newest first through the created_at index)
+    """
+    docs = await evaluations_collection.find(
+        {"trace.stages": {"$exists": True}},
+        {"_id": 0, "trace.stages": 1},
+    ).sort("created_at", -1).limit(limit).to_list(length=limit)
+    return {"jobs": len(docs), "stages": summarize([doc["trace"]["stages"] for doc in docs])}
+
+
+async def _main(limit: int):
+    from app.services import evaluation_consumer
+
+    try:
+        report = await latency_breakdown(evaluation_consumer.get_collection(), limit)
+        print(json.dumps(report, indent=2))
+    finally:
+        evaluation_consumer.close_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency breakdown by stage of recent voice jobs")
+    parser.add_argument("--limit", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(_main(args.limit))
@@ -0,0 +1,148 @@
+import time
+import logging
+from typing import Dict
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, start_http_server
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Cada proceso (API, worker de voz, consumidor) tiene su propio registro:
+# la API lo sirve en GET /metrics y los workers en METRICS_PORT
+
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being served", ["method"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+
+OPENAI_REQUEST_DURATION = Histogram(
+    "openai_request_duration_seconds", "OpenAI API call latency", ["operation", "model"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120),
+)
+OPENAI_ERRORS = Counter(
+    "openai_errors_total", "OpenAI API calls that raised", ["operation", "model", "error"]
+)
+
+MONGO_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency seen by the driver", ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongodb_command_failures_total", "MongoDB commands that failed", ["command"]
+)
+
+QUEUE_PUBLISHED = Counter(
+    "queue_messages_published_total", "Messages published to RabbitMQ", ["queue"]
+)
+QUEUE_CONSUMED = Counter(
+    "queue_messages_consumed_total", "Messages consumed from RabbitMQ by outcome", ["queue", "outcome"]
+)
+CONSUMER_PROCESSING_DURATION = Histogram(
+    "consumer_processing_seconds", "Time a consumer spends on one unit of work (message or batch)",
+    ["consumer"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total", "Requests rejected with 429 by admission control", ["endpoint", "reason"]
+)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    Records every driver command in MONGO_COMMAND_DURATION. The driver
+    already measures the duration, so no state is kept between events.
+    """
+
+    def __init__(self):
+        # .labels() toma un lock y arma la tupla de etiquetas: se hace una vez por comando
+        self._histograms: Dict[str, Histogram] = {}
+
+    def _histogram(self, command: str) -> Histogram:
+        child = self._histograms.get(command)
+        if child is None:
+            child = self._histograms[command] = MONGO_COMMAND_DURATION.labels(command)
+        return child
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._histogram(event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self._histogram(event.command_name).observe(event.duration_micros / 1e6)
+        MONGO_COMMAND_FAILURES.labels(event.command_name).inc()
+
+
+# Se pasa como event_listeners a cada AsyncIOMotorClient
+mongo_command_listener = MongoCommandListener()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware for request latency and in-flight requests. The route
+    label is the path template ("/users/{user_id}"), resolved from the
+    endpoint the router stored in the scope, so label cardinality stays
+    bounded; unmatched paths are grouped as "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._templates: Dict[object, str] = {}
+        self._histograms: Dict[tuple, Histogram] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        template = self._templates.get(endpoint)
+        if template is None:
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint:
+                    template = route.path
+                    break
+            self._templates[endpoint] = template = template or "unmatched"
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            key = (method, self._route(scope), status)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = HTTP_REQUEST_DURATION.labels(method, key[1], str(status))
+            histogram.observe(elapsed)
+
+
+def render_metrics() -> bytes:
+    return generate_latest()
+
+
+def start_metrics_server(port: int):
+    """
+    Serve /metrics from a worker process on `port` (0 disables it)
+    """
+    if port:
+        start_http_server(port)
+        logger.info(f"Metrics on :{port}/metrics")
@@ -0,0 +1,46 @@
+import time
+from openai import AsyncOpenAI
+from app.config import settings
+from app.services.metrics import OPENAI_ERRORS, OPENAI_REQUEST_DURATION
+
+# Cliente asíncrono compartido: las llamadas a Whisper y GPT no bloquean el event loop,
+# así un mismo worker puede tener muchos análisis en curso a la vez.
+client = AsyncOpenAI(
+    api_key=settings.OPENAI_API_KEY,
+    max_retries=settings.OPENAI_MAX_RETRIES,
+)
+
+
+async def transcribe(file, model: str = settings.WHISPER_MODEL) -> str:
+    """Transcribe un archivo de audio (ruta abierta o tupla (nombre, fichero, tipo))"""
+    start = time.perf_counter()
+    try:
+        resp = await client.audio.transcriptions.create(
+            model=model,
+            file=file,
+            timeout=settings.WHISPER_TIMEOUT,
+        )
+    except Exception as e:
+        OPENAI_ERRORS.labels("transcription", model, type(e).__name__).inc()
+        raise
+    finally:
+        OPENAI_REQUEST_DURATION.labels("transcription", model).observe(time.perf_counter() - start)
+    return getattr(resp, "text", "").strip()
+
+
+async def complete(prompt: str, model: str = settings.GPT_MODEL, **kwargs) -> str:
+    """Envía un prompt de usuario al modelo de chat y devuelve el texto de la respuesta"""
+    start = time.perf_counter()
+    try:
+        resp = await client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            timeout=settings.GPT_TIMEOUT,
+            **kwargs,
+        )
+    except Exception as e:
+        OPENAI_ERRORS.labels("chat", model, type(e).__name__).inc()
+        raise
+    finally:
+        OPENAI_REQUEST_DURATION.labels("chat", model).observe(time.perf_counter() - start)
+    return (resp.choices[0].message.content or "").strip()
@@ -0,0 +1,79 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+from passlib.context import CryptContext
+from app.config import settings
+
+# Este módulo se importa en los procesos del pool: mantenerlo sin dependencias pesadas
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__rounds=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
+
+_pool: Optional[ProcessPoolExecutor] = None
+# contraseñas por tarea de una importación masiva (~2-3 s con los parámetros por defecto)
+BULK_CHUNK_SIZE = 32
+_bulk_slots = asyncio.Semaphore(max(1, settings.PASSWORD_HASH_WORKERS - 1))
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def hash_many(passwords: List[str]) -> List[str]:
+    return [pwd_context.hash(password) for password in passwords]
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: el pool se crea con Motor y aio-pika ya conectados, y un fork
+        # heredaría sus hilos y locks tomados
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash on the process pool so the CPU-bound Argon2 work never blocks the event loop
+    """
+    return await asyncio.get_running_loop().run_in_executor(get_pool(), hash_password, password)
+
+
+async def hash_passwords_async(passwords: List[str]) -> List[str]:
+    """
+    Hash many passwords (bulk imports) in chunks of up to BULK_CHUNK_SIZE.
+    At most PASSWORD_HASH_WORKERS - 1 chunks are on the pool at a time, across
+    all imports, so a worker is always left for signups instead of
+    them queueing behind the whole import.
+    """
+    if not passwords:
+        return []
+    loop = asyncio.get_running_loop()
+    size = max(1, min(BULK_CHUNK_SIZE, -(-len(passwords) // (settings.PASSWORD_HASH_WORKERS * 4))))
+    chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+
+    async def hash_chunk(chunk: List[str]) -> List[str]:
+        async with _bulk_slots:
+            return await loop.run_in_executor(get_pool(), hash_many, chunk)
+
+    results = await asyncio.gather(*(hash_chunk(chunk) for chunk in chunks))
+    return [hashed for chunk in results for hashed in chunk]
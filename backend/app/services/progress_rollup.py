@@ -0,0 +1,259 @@
+"""
+Per-user progress rollups (colección user_progress, _id = user_id).
+
+evaluation_consumer actualiza el rollup en el mismo flush en que inserta las
+evaluaciones, así el dashboard lee un único documento por _id en lugar de
+agregar el historial completo. Los días son UTC (YYYY-MM-DD).
+
+Reconstrucción desde la colección evaluations:
+
+    python -m app.services.progress_rollup --user <user_id>   # un usuario
+    python -m app.services.progress_rollup                    # todos
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+PROGRESS_COLLECTION = "user_progress"
+DUPLICATE_KEY = 11000
+CEFR_LEVELS = ("A1", "A2", "B1", "B2", "C1", "C2")
+
+
+def _score(value) -> Optional[float]:
+    # GPT a veces omite el puntaje o lo devuelve como texto: solo cuentan números
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value
+
+
+def _cefr(doc: dict) -> Optional[str]:
+    analysis = doc.get("analysis")
+    cefr = analysis.get("cefr") if isinstance(analysis, dict) else None
+    if isinstance(cefr, str) and cefr.strip().upper() in CEFR_LEVELS:
+        return cefr.strip().upper()
+    return None
+
+
+def _day(created_at: datetime) -> str:
+    return created_at.strftime("%Y-%m-%d")
+
+
+def _increments(doc: dict, inc: Dict[str, float]):
+    """Suma a `inc` los contadores que aporta una evaluación"""
+    day = _day(doc["created_at"])
+    if doc.get("status") != "completed":
+        inc["failed_evaluations"] = inc.get("failed_evaluations", 0) + 1
+        return
+
+    analysis = doc.get("analysis") if isinstance(doc.get("analysis"), dict) else {}
+    fields = {"evaluations": 1, f"days.{day}.evaluations": 1}
+    for name in ("grammar", "pron"):
+        score = _score(analysis.get(f"{name}_score"))
+        if score is not None:
+            fields[f"{name}_sum"] = score
+            fields[f"{name}_count"] = 1
+            fields[f"days.{day}.{name}_sum"] = score
+            fields[f"days.{day}.{name}_count"] = 1
+    cefr = _cefr(doc)
+    if cefr:
+        fields[f"cefr_counts.{cefr}"] = 1
+
+    for key, value in fields.items():
+        inc[key] = inc.get(key, 0) + value
+
+
+def _streak_pipeline(day: datetime) -> list:
+    """
+    Update pipeline for the daily streak: same day keeps it, the next day
+    extends it, a gap restarts it; an older (out of order) day changes nothing
+    """
+    previous = day - timedelta(days=1)
+    return [
+        {"$set": {
+            # dentro de un mismo $set todas las expresiones ven los valores anteriores
+            "current_streak": {"$switch": {
+                "branches": [
+                    {"case": {"$gte": ["$last_active_day", day]}, "then": "$current_streak"},
+                    {"case": {"$eq": ["$last_active_day", previous]},
+                     "then": {"$add": ["$current_streak", 1]}},
+                ],
+                "default": 1,
+            }},
+            "last_active_day": {"$max": ["$last_active_day", day]},
+        }},
+        {"$set": {"longest_streak": {"$max": [{"$ifNull": ["$longest_streak", 0]}, "$current_streak"]}}},
+    ]
+
+
+def current_streak(rollup: dict, today: Optional[datetime] = None) -> int:
+    """
+    Stored streak as of today (UTC): it is only updated on activity, so it is
+    over once the last active day is before yesterday
+    """
+    last_day = rollup.get("last_active_day")
+    today = today or datetime.strptime(_day(datetime.utcnow()), "%Y-%m-%d")
+    if not isinstance(last_day, datetime) or last_day < today - timedelta(days=1):
+        return 0
+    return rollup.get("current_streak", 0)
+
+
+def rollup_updates(docs: List[dict]) -> List[UpdateOne]:
+    """
+    Upserts for the rollups touched by a batch of newly stored evaluations:
+    one $inc/$set/$max update per user, a last_cefr update guarded by
+    last_cefr_at, and one streak update per active day
+    """
+    by_user: Dict[str, List[dict]] = {}
+    for doc in docs:
+        if doc.get("user_id") and isinstance(doc.get("created_at"), datetime):
+            by_user.setdefault(doc["user_id"], []).append(doc)
+
+    updates = []
+    now = datetime.utcnow()
+    for user_id, user_docs in by_user.items():
+        user_docs.sort(key=lambda d: d["created_at"])
+        inc: Dict[str, float] = {}
+        for doc in user_docs:
+            _increments(doc, inc)
+
+        completed = [d for d in user_docs if d.get("status") == "completed"]
+        update = {
+            "$inc": inc,
+            "$set": {"updated_at": now},
+            "$max": {"last_evaluation_at": user_docs[-1]["created_at"]},
+            "$min": {"first_evaluation_at": user_docs[0]["created_at"]},
+        }
+        updates.append(UpdateOne({"_id": user_id}, update, upsert=True))
+
+        with_cefr = [d for d in completed if _cefr(d)]
+        if with_cefr:
+            latest = with_cefr[-1]["created_at"]
+            # un lote atrasado o fuera de orden no pisa un nivel más reciente
+            updates.append(UpdateOne(
+                {"_id": user_id, "$or": [{"last_cefr_at": {"$lte": latest}}, {"last_cefr_at": {"$exists": False}}]},
+                {"$set": {"last_cefr": _cefr(with_cefr[-1]), "last_cefr_at": latest}},
+            ))
+
+        days = sorted({datetime.strptime(_day(d["created_at"]), "%Y-%m-%d") for d in completed})
+        for day in days:
+            updates.append(UpdateOne({"_id": user_id}, _streak_pipeline(day), upsert=True))
+    return updates
+
+
+async def apply_rollups(progress_collection, docs: List[dict]):
+    """
+    Apply the rollup updates of a batch in order. An upsert that lost the
+    race against another consumer (duplicate _id) is retried once, after
+    which the document exists and the update applies normally.
+    """
+    updates = rollup_updates(docs)
+    if not updates:
+        return
+    try:
+        await progress_collection.bulk_write(updates, ordered=True)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if not errors or errors[0].get("code") != DUPLICATE_KEY:
+            raise
+        # ordered=True: todo lo anterior al error ya se aplicó
+        await progress_collection.bulk_write(updates[errors[0]["index"]:], ordered=True)
+
+
+def build_rollup(user_id: str, docs: List[dict]) -> dict:
+    """
+    Full rollup document of a user from their evaluations in created_at order;
+    same shape as the incremental updates
+    """
+    inc: Dict[str, float] = {}
+    rollup = {"_id": user_id, "current_streak": 0, "longest_streak": 0}
+    last_day = None
+    for doc in docs:
+        _increments(doc, inc)
+        rollup.setdefault("first_evaluation_at", doc["created_at"])
+        rollup["last_evaluation_at"] = doc["created_at"]
+        if doc.get("status") != "completed":
+            continue
+
+        if _cefr(doc):
+            rollup["last_cefr"] = _cefr(doc)
+            rollup["last_cefr_at"] = doc["created_at"]
+
+        day = datetime.strptime(_day(doc["created_at"]), "%Y-%m-%d")
+        if last_day is None or day - last_day > timedelta(days=1):
+            rollup["current_streak"] = 1
+        elif day - last_day == timedelta(days=1):
+            rollup["current_streak"] += 1
+        rollup["longest_streak"] = max(rollup["longest_streak"], rollup["current_streak"])
+        rollup["last_active_day"] = last_day = day
+
+    # las claves con puntos ("days.2024-05-01.evaluations") se despliegan en subdocumentos
+    for key, value in inc.items():
+        target = rollup
+        *parents, leaf = key.split(".")
+        for part in parents:
+            target = target.setdefault(part, {})
+        target[leaf] = value
+    rollup["updated_at"] = datetime.utcnow()
+    return rollup
+
+
+async def rebuild(evaluations_collection, progress_collection, user_id: Optional[str] = None,
+                  batch_size: int = 500) -> int:
+    """
+    Recompute rollups from the raw evaluations (one user or all of them),
+    replacing the stored documents; returns the number of users rebuilt
+    """
+    query = {"user_id": user_id} if user_id else {"user_id": {"$type": "string"}}
+    # orden inverso exacto del índice user_id_created_at: sin ordenamiento en memoria
+    cursor = evaluations_collection.find(
+        query, {"user_id": 1, "status": 1, "created_at": 1, "analysis": 1}
+    ).sort([("user_id", -1), ("created_at", 1), ("_id", 1)])
+
+    rebuilt = 0
+    pending: List[ReplaceOne] = []
+    current, docs = None, []
+
+    async def emit():
+        nonlocal rebuilt, pending
+        if current is not None:
+            pending.append(ReplaceOne({"_id": current}, build_rollup(current, docs), upsert=True))
+            rebuilt += 1
+        if len(pending) >= batch_size:
+            await progress_collection.bulk_write(pending, ordered=False)
+            pending = []
+
+    async for doc in cursor:
+        if doc["user_id"] != current:
+            await emit()
+            current, docs = doc["user_id"], []
+        if isinstance(doc.get("created_at"), datetime):
+            docs.append(doc)
+    await emit()
+    if pending:
+        await progress_collection.bulk_write(pending, ordered=False)
+    if user_id and not rebuilt:
+        # sin evaluaciones no debe quedar un rollup viejo
+        await progress_collection.delete_one({"_id": user_id})
+    return rebuilt
+
+
+async def _main(user_id: Optional[str]):
+    from app.services import evaluation_consumer
+
+    evaluations = evaluation_consumer.get_collection()
+    try:
+        await evaluation_consumer.ensure_indexes()
+        count = await rebuild(evaluations, evaluations.database[PROGRESS_COLLECTION], user_id)
+        print(f"Rollups reconstruidos: {count} usuarios")
+    finally:
+        evaluation_consumer.close_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild user_progress rollups from evaluations")
+    parser.add_argument("--user", help="rebuild a single user (default: all)")
+    args = parser.parse_args()
+    asyncio.run(_main(args.user))
@@ -0,0 +1,70 @@
+import hashlib
+import json
+from typing import Dict, Optional
+from app.config import settings
+
+
+class PromptTemplate:
+    """
+    Versioned prompt: the version is a hash of the template, model and
+    parameters, so editing any of them produces a new version and
+    invalidates the cached analyses of the previous one.
+    """
+
+    def __init__(self, name: str, template: str, model: str = settings.GPT_MODEL, params: Optional[dict] = None):
+        self.name = name
+        self.template = template
+        self.model = model
+        self.params = params or {}
+        fingerprint = json.dumps([template, model, self.params], sort_keys=True, ensure_ascii=False)
+        self.version = hashlib.sha256(fingerprint.encode()).hexdigest()[:12]
+
+    def render(self, text: str) -> str:
+        # replace en lugar de format: la transcripción puede traer llaves
+        return self.template.replace("{text}", text)
+
+
+PROMPTS: Dict[str, PromptTemplate] = {}
+
+
+def register_prompt(prompt: PromptTemplate) -> PromptTemplate:
+    PROMPTS[prompt.name] = prompt
+    return prompt
+
+
+def get_prompt(name: str) -> PromptTemplate:
+    try:
+        return PROMPTS[name]
+    except KeyError:
+        raise ValueError(f"Unknown prompt: {name}")
+
+
+# Feedback breve en texto libre (POST /voice/analyze-voice)
+VOICE_FEEDBACK = register_prompt(PromptTemplate(
+    name="voice_feedback",
+    template="""
+        Eres un tutor de pronunciación y gramática. Evalúa el texto siguiente:
+        '{text}'
+        Da feedback breve sobre:
+        - Errores de pronunciación probables
+        - Corrección gramatical
+        - Nivel aproximado (A1–C2)
+        """,
+    params={"max_tokens": 200},
+))
+
+# Evaluación estructurada en JSON (worker voice_analysis_ai)
+VOICE_EVALUATION = register_prompt(PromptTemplate(
+    name="voice_evaluation",
+    template=(
+        "Eres un tutor de idiomas. Lee la siguiente transcripción de un estudiante y "
+        "genera: 1) una breve corrección sugerida (una frase), "
+        "2) posibles errores de pronunciación (palabras o sonidos), "
+        "3) puntaje estimado de gramática y pronunciación (0-100), "
+        "4) nivel CEFR (A1–C2).\n\n"
+        "Transcripción:\n{text}\n\n"
+        "Responde en JSON con las llaves: "
+        "transcription, correction, pronunciation_issues, grammar_score, pron_score, cefr, feedback_text"
+    ),
+    params={"temperature": 0.2},
+))
@@ -2,6 +2,11 @@ import aio_pika
 import json
 import os
 import asyncio
+import logging
+from typing import Iterable, Optional
+from aio_pika.pool import Pool
+from app.config import settings
+from app.services.metrics import QUEUE_PUBLISHED
 
 # Variables de entorno (.env)
 RABBITMQ_USER = os.getenv("RABBITMQ_USER", "admin")
@@ -9,8 +14,12 @@ RABBITMQ_PASS = os.getenv("RABBITMQ_PASS", "lingua123")
 RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "rabbitmq")
 RABBITMQ_QUEUE = "voice_analysis"
 
-async def send_message(queue_name: str, message: dict):
+logger = logging.getLogger(__name__)
+
+
+async def send_message(queue_name: str, message: dict, headers: Optional[dict] = None):
     ## Envía un mensaje a RabbitMQ en la cola especificada.
+    ## Abre una conexión por mensaje: para la API usar `publisher`.
     try:
         connection = await aio_pika.connect_robust(
             f"amqp://{RABBITMQ_USER}:{RABBITMQ_PASS}@{RABBITMQ_HOST}/"
@@ -19,9 +28,123 @@ async def send_message(queue_name: str, message: dict):
             channel = await connection.channel()
             await channel.declare_queue(queue_name, durable=True)
             await channel.default_exchange.publish(
-                aio_pika.Message(body=json.dumps(message).encode()),
+                aio_pika.Message(body=json.dumps(message).encode(), headers=headers),
                 routing_key=queue_name,
             )
+            QUEUE_PUBLISHED.labels(queue_name).inc()
             print(f"Mensaje enviado a {queue_name}: {message}")
     except Exception as e:
         print(f"Error: enviando mensaje a RabbitMQ: {e}")
+        raise
+
+
+class RabbitMQPublisher:
+    """
+    Long-lived publisher: one robust connection, a pool of channels and a
+    cache of the queues already declared, so a publish costs a single frame
+    instead of a TCP + AMQP handshake.
+    """
+
+    def __init__(
+        self,
+        url: str = settings.RABBITMQ_URL,
+        pool_size: int = settings.RABBITMQ_CHANNEL_POOL_SIZE,
+        confirms: bool = settings.RABBITMQ_PUBLISHER_CONFIRMS,
+    ):
+        self.url = url
+        self.pool_size = pool_size
+        self.confirms = confirms
+        self.connection: Optional[aio_pika.RobustConnection] = None
+        self.channel_pool: Optional[Pool] = None
+        self._declared_queues = set()
+        self._connect_lock = asyncio.Lock()
+
+    async def connect(self):
+        """
+        Open the connection and the channel pool (idempotent)
+        """
+        async with self._connect_lock:
+            if self.connection is not None:
+                return
+            self.connection = await aio_pika.connect_robust(self.url)
+            self.channel_pool = Pool(self._open_channel, max_size=self.pool_size)
+            logger.info(f"Connected to RabbitMQ (channel pool: {self.pool_size}, confirms: {self.confirms})")
+
+    async def close(self):
+        """
+        Close the channel pool and the connection
+        """
+        if self.channel_pool is not None:
+            await self.channel_pool.close()
+            self.channel_pool = None
+        if self.connection is not None:
+            await self.connection.close()
+            self.connection = None
+        self._declared_queues.clear()
+
+    async def _open_channel(self) -> aio_pika.abc.AbstractChannel:
+        return await self.connection.channel(publisher_confirms=self.confirms)
+
+    async def _ensure_queue(self, channel, queue_name: str):
+        if queue_name in self._declared_queues:
+            return
+        await channel.declare_queue(queue_name, durable=True)
+        self._declared_queues.add(queue_name)
+
+    @staticmethod
+    def _build_message(message: dict, headers: Optional[dict] = None) -> aio_pika.Message:
+        return aio_pika.Message(
+            body=json.dumps(message, ensure_ascii=False).encode(),
+            content_type="application/json",
+            headers=headers,
+        )
+
+    async def publish(self, queue_name: str, message: dict, headers: Optional[dict] = None):
+        """
+        Publish one JSON message; with confirms enabled it returns once the broker acked it
+        """
+        if self.connection is None:
+            await self.connect()
+
+        async with self.channel_pool.acquire() as channel:
+            await self._ensure_queue(channel, queue_name)
+            await channel.default_exchange.publish(
+                self._build_message(message, headers),
+                routing_key=queue_name,
+            )
+        QUEUE_PUBLISHED.labels(queue_name).inc()
+
+    async def queue_depth(self, queue_name: str) -> int:
+        """
+        Ready (not yet delivered) messages in a queue, read with a passive declare
+        """
+        if self.connection is None:
+            await self.connect()
+
+        async with self.channel_pool.acquire() as channel:
+            # un declare pasivo de una cola inexistente cierra el canal: se asegura antes
+            await self._ensure_queue(channel, queue_name)
+            queue = await channel.declare_queue(queue_name, durable=True, passive=True)
+            return queue.declaration_result.message_count
+
+    async def publish_batch(self, queue_name: str, messages: Iterable[dict]) -> int:
+        """
+        Publish many JSON messages on one channel; confirms are awaited together
+        """
+        if self.connection is None:
+            await self.connect()
+
+        async with self.channel_pool.acquire() as channel:
+            await self._ensure_queue(channel, queue_name)
+            exchange = channel.default_exchange
+            publishes = [
+                exchange.publish(self._build_message(message), routing_key=queue_name)
+                for message in messages
+            ]
+            # con confirms los publish se encadenan y se esperan todos los acks a la vez
+            await asyncio.gather(*publishes)
+            QUEUE_PUBLISHED.labels(queue_name).inc(len(publishes))
+            return len(publishes)
+
+
+publisher = RabbitMQPublisher()
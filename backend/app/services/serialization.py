@@ -0,0 +1,41 @@
+from typing import Any, Iterable
+import orjson
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+
+
+def json_default(obj: Any) -> Any:
+    """Tipos de Mongo que orjson no conoce (datetime, UUID y Enum los resuelve él)"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=json_default)
+
+
+def dumps_line(obj: Any) -> bytes:
+    """Una fila NDJSON (termina en salto de línea)"""
+    return orjson.dumps(obj, default=json_default, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def to_response_doc(doc: dict, fields: Iterable[str]) -> dict:
+    """
+    Raw Mongo document -> response dict ("_id" as string, only `fields`),
+    without building Pydantic models
+    """
+    out = {"_id": str(doc["_id"])}
+    for field in fields:
+        out[field] = doc.get(field)
+    return out
+
+
+class ORJSONResponse(_ORJSONResponse):
+    """
+    Default response class of the app: orjson plus ObjectId support. Routes
+    that return it directly also skip FastAPI's response_model re-validation.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
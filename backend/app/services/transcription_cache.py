@@ -0,0 +1,63 @@
+import asyncio
+import hashlib
+from typing import BinaryIO
+from app.config import settings
+from app.database.mongodb import mongodb
+from app.services import openai_client
+from app.services.audio_preprocessing import preprocess_samples, preprocess_wav
+from app.services.chunked_transcription import needs_chunking, transcribe_samples
+from app.services.cache import LRUCache, MongoCache, TieredCache
+
+HASH_CHUNK_SIZE = 1024 * 1024
+# forma parte de la clave: un cambio en el preprocesado no reutiliza transcripciones viejas
+PREPROCESS_VERSION = "pp3" if settings.AUDIO_PREPROCESS else "raw"
+
+# Clave: modelo + sha256 del audio, así un reenvío del mismo archivo no vuelve a Whisper
+transcription_cache = TieredCache(
+    "transcription",
+    LRUCache(settings.TRANSCRIPTION_CACHE_SIZE),
+    MongoCache("transcription_cache", settings.TRANSCRIPTION_CACHE_TTL, lambda: mongodb.database),
+)
+
+
+def hash_audio(fileobj: BinaryIO) -> str:
+    """Calcula el sha256 del audio por bloques y rebobina el archivo"""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def _read_and_preprocess(fileobj: BinaryIO):
+    fileobj.seek(0)
+    data = fileobj.read()
+    fileobj.seek(0)
+    return data, preprocess_samples(data)
+
+
+async def transcribe_cached(audio, model: str = settings.WHISPER_MODEL) -> str:
+    """
+    Transcribe un audio (archivo o tupla (nombre, archivo, tipo)) pasando por la
+    caché; subidas idénticas simultáneas comparten una sola llamada a Whisper
+    """
+    fileobj = audio[1] if isinstance(audio, tuple) else audio
+    key = f"{model}:{PREPROCESS_VERSION}:{await asyncio.to_thread(hash_audio, fileobj)}"
+
+    async def load() -> str:
+        upload = audio
+        if settings.AUDIO_PREPROCESS:
+            # mono 16 kHz sin silencios: menos bytes que subir y menos audio que transcribir
+            data, samples = await asyncio.to_thread(_read_and_preprocess, fileobj)
+            if samples is not None and needs_chunking(samples):
+                # las grabaciones largas se transcriben por fragmentos en paralelo
+                return await transcribe_samples(samples, model=model)
+            if samples is not None:
+                processed = await asyncio.to_thread(preprocess_wav, data, samples)
+                # si el WAV re-codificado no es más chico se sube el original
+                if processed is not data:
+                    upload = ("audio.wav", processed, "audio/wav")
+        return await openai_client.transcribe(upload, model=model)
+
+    return await transcription_cache.get_or_load(key, load)
@@ -0,0 +1,19 @@
+from app.config import settings
+from app.database.mongodb import mongodb
+from app.services.cache import LRUCache, MongoCache, TieredCache
+
+# Guarda el UserResponse serializado (dict con "_id"), nunca el hash de la contraseña
+user_cache = TieredCache(
+    "users",
+    LRUCache(settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL),
+    MongoCache("user_cache", settings.USER_CACHE_TTL, lambda: mongodb.database) if settings.USER_CACHE_SHARED else None,
+)
+
+
+def user_key(user_id) -> str:
+    return f"user:{user_id}"
+
+
+async def invalidate_user(user_id):
+    """Debe llamarse en todo camino que modifique o borre un usuario"""
+    await user_cache.invalidate(user_key(user_id))
@@ -1,53 +1,128 @@
-from typing import List, Optional
+from typing import Any, List, Optional
+import base64
+import binascii
+import json
+from datetime import datetime
 from beanie import PydanticObjectId
-from app.models.user_model import User, UserCreate, UserResponse
-from passlib.context import CryptContext
+from bson import ObjectId
+from bson.errors import InvalidId
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from app.config import settings
+from app.models.user_model import BulkImportResult, BulkImportRow, User, UserCreate
+from app.services import password_hashing
+from app.services.serialization import to_response_doc
+from app.services.user_cache import invalidate_user, user_cache, user_key
 import logging
 
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
-
 logger = logging.getLogger(__name__)
 
+# Only the fields of UserResponse travel from MongoDB (never hashed_password)
+USER_RESPONSE_PROJECTION = {
+    "email": 1,
+    "username": 1,
+    "full_name": 1,
+    "language_preferences": 1,
+    "is_active": 1,
+    "is_verified": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+
+def serialize_user(doc: dict) -> dict:
+    """
+    Users collection document -> UserResponse-shaped dict, ready for orjson
+    """
+    return to_response_doc(doc, USER_RESPONSE_PROJECTION)
+
+
+def encode_cursor(object_id: ObjectId) -> str:
+    return base64.urlsafe_b64encode(object_id.binary).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> ObjectId:
+    try:
+        return ObjectId(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, InvalidId, TypeError, ValueError):
+        raise ValueError("Invalid pagination cursor")
+
+
+def duplicate_user_message(error_details: Optional[dict]) -> str:
+    """
+    Map a duplicate-key error on the users collection to the API message
+    """
+    details = error_details or {}
+    key_pattern = details.get("keyPattern") or {}
+    if "username" in key_pattern or "username_unique" in details.get("errmsg", ""):
+        return "Username already taken"
+    return "User with this email already exists"
+
+
+def parse_bulk_payload(body: bytes, content_type: str) -> List[Any]:
+    """
+    Split a bulk import body into raw rows: a JSON array, or NDJSON (one object
+    per line) when the content type says so. A malformed NDJSON line becomes a
+    None row so it is reported as invalid without failing the whole import.
+    """
+    if "ndjson" in content_type or "jsonl" in content_type:
+        rows = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                rows.append(None)
+    else:
+        try:
+            rows = json.loads(body)
+        except ValueError:
+            raise ValueError("Body must be a JSON array of users or NDJSON")
+        if not isinstance(rows, list):
+            raise ValueError("Body must be a JSON array of users or NDJSON")
+
+    if not rows:
+        raise ValueError("No users to import")
+    if len(rows) > settings.BULK_IMPORT_MAX_ROWS:
+        raise ValueError(f"Too many users in one import (max {settings.BULK_IMPORT_MAX_ROWS})")
+    return rows
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    )
+
 
 class UserService:
     @staticmethod
     def hash_password(password: str) -> str:
         """
-        Hash a password using Argon2
+        Hash a password using Argon2 (blocking, prefer hash_password_async)
         """
-        return pwd_context.hash(password)
+        return password_hashing.hash_password(password)
 
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
         """
-        Verify a password against its hash
+        Verify a password against its hash (blocking)
         """
-        return pwd_context.verify(plain_password, hashed_password)
+        return password_hashing.verify_password(plain_password, hashed_password)
 
     @staticmethod
-    async def create_user(user_data: UserCreate) -> UserResponse:
+    async def create_user(user_data: UserCreate) -> dict:
         """
         Create a new user in the database
         """
         try:
-
-            existing_user = await User.find_one(User.email == user_data.email)
-            if existing_user:
-                raise ValueError("User with this email already exists")
-
-            existing_username = await User.find_one(User.username == user_data.username)
-            if existing_username:
-                raise ValueError("Username already taken")
-
-
             if len(user_data.password) < 8:
                 raise ValueError("Password must be at least 8 characters long")
 
-   
-            hashed_password = UserService.hash_password(user_data.password)
+            hashed_password = await password_hashing.hash_password_async(user_data.password)
 
-   
             user = User(
                 email=user_data.email,
                 username=user_data.username,
@@ -56,48 +131,128 @@ class UserService:
                 language_preferences=user_data.language_preferences
             )
 
-
-            await user.insert()
+            # Single round trip: the unique indexes reject duplicates atomically
+            try:
+                await user.insert()
+            except DuplicateKeyError as e:
+                raise ValueError(duplicate_user_message(e.details))
 
             logger.info(f"User created successfully: {user.email}")
+            return serialize_user({"_id": user.id, **user.model_dump(include=set(USER_RESPONSE_PROJECTION))})
+
+        except Exception as e:
+            logger.error(f"Error creating user: {str(e)}")
+            raise
 
+    @staticmethod
+    async def bulk_create_users(rows: List[Any]) -> BulkImportResult:
+        """
+        Create many users at once: every row is validated with UserCreate,
+        passwords are hashed in chunks across the hashing pool and the users
+        are written with a single unordered insert_many, so one bad row never
+        blocks the rest. Each row is reported as created, duplicate, invalid
+        or error.
+        """
+        try:
+            results: List[Optional[BulkImportRow]] = [None] * len(rows)
+            valid = []
+            seen_emails, seen_usernames = set(), set()
 
-            return UserResponse(
-                _id=str(user.id),
-                email=user.email,
-                username=user.username,
-                full_name=user.full_name,
-                language_preferences=user.language_preferences,
-                is_active=user.is_active,
-                is_verified=user.is_verified,
-                created_at=user.created_at,
-                updated_at=user.updated_at
-            )
+            for index, row in enumerate(rows):
+                try:
+                    if not isinstance(row, dict):
+                        raise ValueError("Row must be a JSON object")
+                    user_data = UserCreate.model_validate(row)
+                except ValidationError as e:
+                    results[index] = BulkImportRow(index=index, status="invalid", error=_validation_message(e))
+                    continue
+                except ValueError as e:
+                    results[index] = BulkImportRow(index=index, status="invalid", error=str(e))
+                    continue
+
+                # duplicados dentro del mismo archivo: no vale la pena hashearlos
+                if user_data.email in seen_emails or user_data.username in seen_usernames:
+                    message = (
+                        "User with this email already exists" if user_data.email in seen_emails
+                        else "Username already taken"
+                    )
+                    results[index] = BulkImportRow(
+                        index=index, status="duplicate", email=user_data.email, error=message
+                    )
+                    continue
+                seen_emails.add(user_data.email)
+                seen_usernames.add(user_data.username)
+                valid.append((index, user_data))
+
+            hashes = await password_hashing.hash_passwords_async([u.password for _, u in valid])
+
+            now = datetime.utcnow()
+            docs = [
+                {
+                    "email": user_data.email,
+                    "username": user_data.username,
+                    "full_name": user_data.full_name,
+                    "hashed_password": hashed_password,
+                    "language_preferences": [
+                        pref.model_dump(mode="json") for pref in user_data.language_preferences
+                    ],
+                    "is_active": True,
+                    "is_verified": False,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for (_, user_data), hashed_password in zip(valid, hashes)
+            ]
+
+            write_errors = {}
+            if docs:
+                try:
+                    await User.get_motor_collection().insert_many(docs, ordered=False)
+                except BulkWriteError as e:
+                    write_errors = {err["index"]: err for err in e.details.get("writeErrors", [])}
+                    # un error que no es de escritura (p. ej. de red) no se puede atribuir por fila
+                    if not write_errors:
+                        raise
+
+            for position, ((index, user_data), doc) in enumerate(zip(valid, docs)):
+                err = write_errors.get(position)
+                if err is None:
+                    results[index] = BulkImportRow(
+                        index=index, status="created", id=str(doc["_id"]), email=user_data.email
+                    )
+                elif err.get("code") == 11000:
+                    results[index] = BulkImportRow(
+                        index=index, status="duplicate", email=user_data.email,
+                        error=duplicate_user_message(err)
+                    )
+                else:
+                    results[index] = BulkImportRow(
+                        index=index, status="error", email=user_data.email, error=err.get("errmsg")
+                    )
+
+            created = sum(1 for row in results if row.status == "created")
+            logger.info(f"Bulk import: {created} created, {len(rows) - created} failed")
+            return BulkImportResult(created=created, failed=len(rows) - created, results=results)
 
         except Exception as e:
-            logger.error(f"Error creating user: {str(e)}")
+            logger.error(f"Error importing users: {str(e)}")
             raise
 
     @staticmethod
-    async def get_user_by_id(user_id: str) -> Optional[UserResponse]:
+    async def get_user_by_id(user_id: str) -> Optional[dict]:
         """
-        Get user by ID
+        Get user by ID through the read-through user cache; concurrent misses
+        for the same ID share a single query. The dict is shared with the
+        cache and must not be mutated.
         """
         try:
-            user = await User.get(PydanticObjectId(user_id))
-            if user:
-                return UserResponse(
-                    _id=str(user.id),
-                    email=user.email,
-                    username=user.username,
-                    full_name=user.full_name,
-                    language_preferences=user.language_preferences,
-                    is_active=user.is_active,
-                    is_verified=user.is_verified,
-                    created_at=user.created_at,
-                    updated_at=user.updated_at
-                )
-            return None
+            object_id = PydanticObjectId(user_id)
+
+            async def load() -> Optional[dict]:
+                doc = await User.get_motor_collection().find_one({"_id": object_id}, USER_RESPONSE_PROJECTION)
+                return serialize_user(doc) if doc is not None else None
+
+            return await user_cache.get_or_load(user_key(object_id), load)
         except Exception as e:
             logger.error(f"Error getting user by ID {user_id}: {str(e)}")
             raise
@@ -114,26 +269,21 @@ class UserService:
             raise
 
     @staticmethod
-    async def get_all_users(skip: int = 0, limit: int = 100) -> List[UserResponse]:
+    async def get_all_users(cursor: Optional[str] = None, limit: int = 100) -> dict:
         """
-        Get all users with pagination
+        Get users ordered by _id with keyset pagination: each page is an
+        index range scan after the cursor, so its cost does not depend on depth
         """
         try:
-            users = await User.find_all().skip(skip).limit(limit).to_list()
-            return [
-                UserResponse(
-                    _id=str(user.id),
-                    email=user.email,
-                    username=user.username,
-                    full_name=user.full_name,
-                    language_preferences=user.language_preferences,
-                    is_active=user.is_active,
-                    is_verified=user.is_verified,
-                    created_at=user.created_at,
-                    updated_at=user.updated_at
-                )
-                for user in users
-            ]
+            query = {"_id": {"$gt": decode_cursor(cursor)}} if cursor else {}
+            docs = await User.get_motor_collection().find(
+                query, USER_RESPONSE_PROJECTION
+            ).sort("_id", 1).limit(limit + 1).to_list(length=limit + 1)
+
+            has_more = len(docs) > limit
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1]["_id"]) if has_more else None
+            return {"items": [serialize_user(doc) for doc in docs], "next_cursor": next_cursor}
         except Exception as e:
             logger.error(f"Error getting all users: {str(e)}")
             raise
@@ -147,6 +297,7 @@ class UserService:
             user = await User.get(PydanticObjectId(user_id))
             if user:
                 await user.delete()
+                await invalidate_user(user.id)
                 logger.info(f"User deleted: {user_id}")
                 return True
             return False
@@ -154,6 +305,13 @@ class UserService:
             logger.error(f"Error deleting user {user_id}: {str(e)}")
             raise
 
+    @staticmethod
+    def cache_stats() -> dict:
+        """
+        Hit ratio, entry count and coalesced loads of the user cache
+        """
+        return user_cache.stats()
+
 
 # Global service instance
 user_service = UserService()
\ No newline at end of file
@@ -1,118 +1,270 @@
 import os
+import io
 import json
+import time
+import base64
 import aio_pika
 import asyncio
+import signal
 from pathlib import Path
-from openai import OpenAI
-
-# 🔹 Inicializar cliente OpenAI con la API key del entorno
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from typing import Optional, Tuple
+from app.config import settings
+from app.database.mongodb import mongodb
+from app.services.analysis_cache import complete_cached
+from app.services.audio_store import AudioNotFoundError, store_for_ref
+from app.services.fair_scheduling import FAIR_KEY_HEADER, LaneScheduler
+from app.services.job_tracing import now_ms, read_trace, trace_headers
+from app.services.metrics import CONSUMER_PROCESSING_DURATION, QUEUE_CONSUMED, QUEUE_PUBLISHED, start_metrics_server
+from app.services.prompts import VOICE_EVALUATION
+from app.services.transcription_cache import transcribe_cached
 
 RABBITMQ_USER = os.getenv("RABBITMQ_USER", "admin")
 RABBITMQ_PASS = os.getenv("RABBITMQ_PASS", "lingua123")
 RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "rabbitmq")
 
 QUEUE_INPUT = "voice_analysis"
+QUEUE_BULK = "voice_analysis_bulk"
 QUEUE_OUTPUT = "feedback_ready"
+LANE_QUEUES = {"interactive": QUEUE_INPUT, "bulk": QUEUE_BULK}
 
-async def transcribe_with_whisper(path: str) -> str:
-    """Transcribe un archivo de audio usando el modelo Whisper-1"""
-    with open(path, "rb") as f:
-        resp = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=f
-        )
-    text = getattr(resp, "text", "").strip()
-    return text
+async def transcribe_with_whisper(audio: bytes, name: str = "audio.wav") -> str:
+    """Transcribe un audio usando el modelo Whisper-1"""
+    return await transcribe_cached((name, io.BytesIO(audio), "audio/wav"))
 
 
-async def analyze_with_gpt(text: str) -> dict:
-    """Analiza pronunciación y gramática usando GPT-4o-mini"""
-    prompt = (
-        "Eres un tutor de idiomas. Lee la siguiente transcripción de un estudiante y "
-        "genera: 1) una breve corrección sugerida (una frase), "
-        "2) posibles errores de pronunciación (palabras o sonidos), "
-        "3) puntaje estimado de gramática y pronunciación (0-100), "
-        "4) nivel CEFR (A1–C2).\n\n"
-        f"Transcripción:\n{text}\n\n"
-        "Responde en JSON con las llaves: "
-        "transcription, correction, pronunciation_issues, grammar_score, pron_score, cefr, feedback_text"
-    )
+async def fetch_audio(data: dict) -> bytes:
+    """
+    Bytes del audio de un job: dentro del mensaje, por referencia al almacén,
+    o (mensajes anteriores a este formato) en una ruta local
+    """
+    if data.get("audio_inline"):
+        return base64.b64decode(data["audio_inline"])
+    if data.get("audio_ref"):
+        return await store_for_ref(data["audio_ref"]).get(data["audio_ref"])
+    if data.get("filepath") and Path(data["filepath"]).exists():
+        return await asyncio.to_thread(Path(data["filepath"]).read_bytes)
+    raise AudioNotFoundError(data.get("filepath") or data.get("job_id"))
 
-    resp = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2,
-    )
 
-    content = resp.choices[0].message.content.strip()
+async def release_audio(data: dict):
+    """Borra el audio almacenado de un job ya resuelto (completado o fallido)"""
+    try:
+        if data.get("audio_ref"):
+            await store_for_ref(data["audio_ref"]).delete(data["audio_ref"])
+        elif data.get("filepath"):
+            await asyncio.to_thread(Path(data["filepath"]).unlink, missing_ok=True)
+    except Exception as e:
+        # el barrido de retención lo eliminará más tarde
+        print(f"No se pudo borrar el audio del job {data.get('job_id')}: {e}")
+
+
+async def analyze_with_gpt(text: str) -> dict:
+    """Analiza pronunciación y gramática usando GPT-4o-mini"""
+    content = await complete_cached(VOICE_EVALUATION, text)
 
     try:
         parsed = json.loads(content)
     except Exception:
         parsed = {"transcription": text, "feedback_text": content}
 
+    # la caché agrupa variantes de la misma frase: se devuelve la transcripción real
+    if isinstance(parsed, dict):
+        parsed["transcription"] = text
+
     return parsed
 
-async def process_and_publish(path: str, original_name: str, metadata: dict, channel):
+async def process_and_publish(audio: bytes, original_name: str, metadata: dict, channel,
+                              trace: Optional[Tuple[Optional[str], dict]] = None):
     print(f"Procesando archivo: {original_name}")
+    correlation_id, stamps = trace or (None, {})
 
-    transcription = await transcribe_with_whisper(path)
+    transcription = await transcribe_with_whisper(audio, original_name or "audio.wav")
+    stamps["transcribed"] = now_ms()
     analysis = await analyze_with_gpt(transcription)
+    stamps["analyzed"] = now_ms()
 
     result = {
+        "job_id": metadata.get("job_id"),
+        "user_id": metadata.get("user_id"),
+        "status": "completed",
         "original_name": original_name,
-        "filepath": path,
         "transcription": transcription,
         "analysis": analysis,
         "metadata": metadata,
     }
 
+    await publish_result(result, channel, (correlation_id, stamps))
+    return result
+
+
+async def publish_result(result: dict, channel, trace: Optional[Tuple[Optional[str], dict]] = None):
     body = json.dumps(result, ensure_ascii=False).encode()
 
+    # la traza sigue en los headers: el cuerpo del resultado no cambia
+    headers = None
+    if trace is not None:
+        correlation_id, stamps = trace
+        stamps["worker_published"] = now_ms()
+        headers = trace_headers(correlation_id or result.get("job_id"), stamps)
+
     await channel.default_exchange.publish(
-        aio_pika.Message(body=body),
+        aio_pika.Message(body=body, headers=headers),
         routing_key=QUEUE_OUTPUT,
     )
+    QUEUE_PUBLISHED.labels(QUEUE_OUTPUT).inc()
 
     print(f"Resultado publicado en la cola '{QUEUE_OUTPUT}'")
-    return result
 
 
-async def consume():    
+async def publish_failure(data: dict, error: str, channel, trace: Optional[Tuple[Optional[str], dict]] = None):
+    """Publica un resultado fallido para que GET /voice/jobs/{id} no quede pendiente"""
+    if not data.get("job_id"):
+        return
+    await publish_result({
+        "job_id": data["job_id"],
+        "user_id": data.get("user_id"),
+        "status": "failed",
+        "original_name": data.get("original_name"),
+        "error": error,
+    }, channel, trace)
+
+
+async def handle_message(message, channel, queue: str = QUEUE_INPUT):
+    """Procesa un mensaje de voice_analysis(_bulk); el ack se envía al terminar"""
+    # requeue=True: solo escapa la cancelación del drenado, y ese job debe reintentarse
+    async with message.process(requeue=True):
+        data = {}
+        outcome = "failed"
+        start = time.perf_counter()
+        correlation_id, stamps = read_trace(message.headers)
+        stamps["worker_started"] = now_ms()
+        trace = (correlation_id, stamps)
+        try:
+            data = json.loads(message.body)
+            original = data.get("original_name")
+            metadata = {
+                "size": data.get("size", 0),
+                "job_id": data.get("job_id"),
+                "user_id": data.get("user_id"),
+                "lane": data.get("lane", "interactive"),
+            }
+
+            try:
+                audio = await fetch_audio(data)
+            except AudioNotFoundError:
+                outcome = "missing_audio"
+                print(f"Audio no encontrado para el job {data.get('job_id')}")
+                await publish_failure(data, "Audio no encontrado", channel, trace)
+                return
+            stamps["audio_fetched"] = now_ms()
+
+            await process_and_publish(audio, original, metadata, channel, trace)
+            outcome = "completed"
+            await release_audio(data)
+        except Exception as e:
+            print(f"Error procesando mensaje: {e}")
+            try:
+                await publish_failure(data, str(e), channel, trace)
+                await release_audio(data)
+            except Exception as publish_error:
+                print(f"Error publicando el fallo: {publish_error}")
+        finally:
+            QUEUE_CONSUMED.labels(queue, outcome).inc()
+            CONSUMER_PROCESSING_DURATION.labels("voice_analysis_ai").observe(time.perf_counter() - start)
+
+
+async def consume(concurrency: int = settings.VOICE_WORKER_CONCURRENCY):
     url = f"amqp://{RABBITMQ_USER}:{RABBITMQ_PASS}@{RABBITMQ_HOST}/"
     print(f"Conectando a RabbitMQ en {url}")
+    start_metrics_server(settings.VOICE_WORKER_METRICS_PORT)
+
+    try:
+        # nivel compartido de la caché y almacén GridFS de audio; sin Mongo solo
+        # se procesan los clips que vienen dentro del mensaje
+        await mongodb.connect_to_database()
+    except Exception as e:
+        print(f"Sin MongoDB para la caché de transcripciones: {e}")
 
     connection = await aio_pika.connect_robust(url)
 
     async with connection:
         channel = await connection.channel()
+        # `concurrency` mensajes en curso más un margen retenido en el scheduler: así
+        # RabbitMQ sigue entregando los de otros usuarios detrás de la ráfaga de uno
+        await channel.set_qos(prefetch_count=concurrency + settings.VOICE_INTERACTIVE_HOLD)
         await channel.declare_queue(QUEUE_INPUT, durable=True)
         await channel.declare_queue(QUEUE_OUTPUT, durable=True)
+        # los lotes en su propio canal: una ventana más grande para alternar entre usuarios
+        bulk_channel = await connection.channel()
+        await bulk_channel.set_qos(prefetch_count=settings.VOICE_BULK_PREFETCH)
+        await bulk_channel.declare_queue(QUEUE_BULK, durable=True)
+
+        scheduler = LaneScheduler({
+            "interactive": settings.VOICE_INTERACTIVE_WEIGHT,
+            "bulk": settings.VOICE_BULK_WEIGHT,
+        }, max_in_flight=settings.VOICE_USER_MAX_IN_FLIGHT)
+        semaphore = asyncio.Semaphore(concurrency)
+        in_flight = set()
+        stop = asyncio.Event()
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        async def run(message, lane, key):
+            try:
+                await handle_message(message, channel, LANE_QUEUES[lane])
+            finally:
+                scheduler.done(key)
+                semaphore.release()
+
+        async def dispatch():
+            # los mensajes recibidos esperan en el scheduler; cada hueco libre se
+            # asigna por round-robin ponderado entre colas y por usuario dentro de cada una
+            while True:
+                await semaphore.acquire()
+                try:
+                    lane, key, message = await scheduler.next()
+                except asyncio.CancelledError:
+                    semaphore.release()
+                    raise
+                task = asyncio.create_task(run(message, lane, key))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+
+        def receiver(lane):
+            async def on_message(message):
+                scheduler.put(lane, (message.headers or {}).get(FAIR_KEY_HEADER) or "anonymous", message)
+            return on_message
 
-        print(f"Analizador de Voz AI escuchando cola: {QUEUE_INPUT}")
         queue = await channel.get_queue(QUEUE_INPUT)
+        bulk_queue = await bulk_channel.get_queue(QUEUE_BULK)
+        consumer_tag = await queue.consume(receiver("interactive"))
+        bulk_consumer_tag = await bulk_queue.consume(receiver("bulk"))
+        dispatcher = asyncio.create_task(dispatch())
+        print(f"Analizador de Voz AI escuchando colas: {QUEUE_INPUT}, {QUEUE_BULK} (concurrencia: {concurrency})")
 
-        async with queue.iterator() as it:
-            async for message in it:
-                async with message.process():
-                    try:
-                        data = json.loads(message.body)
-                        filepath = data.get("filepath")
-                        original = data.get("original_name")
-                        metadata = {"size": data.get("size", 0)}
+        await stop.wait()
 
-                        if not filepath or not Path(filepath).exists():
-                            print(f"Archivo no encontrado: {filepath}")
-                            continue
+        # Drenado: dejar de recibir y esperar a que terminen los jobs en curso
+        print(f"Deteniendo: esperando {len(in_flight)} jobs en curso...")
+        await queue.cancel(consumer_tag)
+        await bulk_queue.cancel(bulk_consumer_tag)
+        dispatcher.cancel()
+        # los retenidos sin empezar vuelven a su cola para otro worker
+        for message in scheduler.drain():
+            await message.nack(requeue=True)
+        if in_flight:
+            done, pending = await asyncio.wait(in_flight, timeout=settings.VOICE_WORKER_DRAIN_TIMEOUT)
+            for task in pending:
+                # sin ack, RabbitMQ reentrega estos mensajes a otro worker
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
 
-                        await process_and_publish(filepath, original, metadata, channel)
-                    except Exception as e:
-                        print(f"Error procesando mensaje: {e}")
+    await mongodb.close_database_connection()
 
 
 if __name__ == "__main__":
-    try:
-        asyncio.run(consume())
-    except KeyboardInterrupt:
-        print("Servicio Voice AI detenido manualmente")
+    asyncio.run(consume())
+    print("Servicio Voice AI detenido")
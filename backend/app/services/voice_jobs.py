@@ -0,0 +1,114 @@
+import base64
+import uuid
+import logging
+from typing import BinaryIO, Optional
+from app.config import settings
+from app.database.mongodb import mongodb
+from app.services.admission import AdmissionRejected, QueueDepthGate
+from app.services.audio_store import get_audio_store
+from app.services.fair_scheduling import FAIR_KEY_HEADER, TokenBuckets
+from app.services.job_tracing import now_ms, trace_headers
+from app.services.rabbitmq_utils import publisher
+
+QUEUE_INPUT = "voice_analysis"
+QUEUE_BULK = "voice_analysis_bulk"
+LANE_QUEUES = {"interactive": QUEUE_INPUT, "bulk": QUEUE_BULK}
+
+logger = logging.getLogger(__name__)
+
+# jobs interactivos por usuario (por proceso de la API)
+user_buckets = TokenBuckets(settings.VOICE_USER_BURST, settings.VOICE_USER_RATE_PER_MIN)
+
+# backpressure: no se aceptan jobs mientras la cola de su carril está llena
+queue_gate = QueueDepthGate(
+    publisher.queue_depth,
+    {QUEUE_INPUT: settings.VOICE_QUEUE_MAX_DEPTH, QUEUE_BULK: settings.VOICE_BULK_QUEUE_MAX_DEPTH},
+    ttl=settings.VOICE_QUEUE_DEPTH_TTL,
+    retry_after=settings.VOICE_QUEUE_RETRY_AFTER,
+)
+
+
+def _size(fileobj: BinaryIO) -> int:
+    fileobj.seek(0, 2)
+    size = fileobj.tell()
+    fileobj.seek(0)
+    return size
+
+
+class VoiceJobService:
+    @staticmethod
+    async def submit_job(fileobj: BinaryIO, original_name: str, user_id: Optional[str] = None,
+                         correlation_id: Optional[str] = None, received_at: Optional[int] = None,
+                         bulk: bool = False, client_key: Optional[str] = None) -> dict:
+        """
+        Queue the audio for the AI worker, returning the job ID. Clips up to
+        AUDIO_INLINE_MAX_BYTES travel inside the message; larger ones go to
+        the audio store and the message carries the reference, so the worker
+        can run on any node. `user_id` is carried through to the evaluation.
+
+        The message headers start the job trace: `correlation_id` (the job ID
+        unless the caller sent one) and the API timestamps in epoch ms.
+
+        The job goes to the interactive lane while its owner (`user_id`, else
+        `client_key`) has tokens left; `bulk` jobs and the excess of a burst
+        go to the bulk lane, which the worker drains with a lower weight.
+
+        Raises AdmissionRejected, before storing anything, while that lane's
+        queue is at its depth limit
+        """
+        job_id = uuid.uuid4().hex
+        correlation_id = correlation_id or job_id
+        stamps = {"api_received": received_at or now_ms()}
+        fair_key = user_id or client_key or "anonymous"
+        lane = "bulk" if bulk or not user_buckets.try_take(fair_key) else "interactive"
+        try:
+            await queue_gate.check(LANE_QUEUES[lane])
+        except AdmissionRejected:
+            # un job rechazado no gasta el cupo interactivo del usuario
+            if lane == "interactive":
+                user_buckets.refund(fair_key)
+            raise
+        size = _size(fileobj)
+        message = {
+            "job_id": job_id,
+            "original_name": original_name,
+            "size": size,
+            "user_id": user_id,
+            "lane": lane,
+        }
+
+        # clips cortos dentro del mensaje; el resto en el almacén compartido
+        ref = None
+        if size <= settings.AUDIO_INLINE_MAX_BYTES:
+            message["audio_inline"] = base64.b64encode(fileobj.read()).decode()
+        else:
+            store = get_audio_store()
+            ref = await store.put(job_id, fileobj)
+            message["audio_ref"] = ref
+
+        try:
+            stamps["api_published"] = now_ms()
+            headers = trace_headers(correlation_id, stamps)
+            headers[FAIR_KEY_HEADER] = fair_key
+            await publisher.publish(LANE_QUEUES[lane], message, headers=headers)
+        except Exception:
+            if ref:
+                await store.delete(ref)
+            raise
+
+        logger.info(f"Voice job queued: {job_id} (lane={lane}, correlation_id={correlation_id})")
+        return {"job_id": job_id, "correlation_id": correlation_id, "status": "queued", "lane": lane}
+
+    @staticmethod
+    async def get_job(job_id: str) -> Optional[dict]:
+        """
+        Get the evaluation persisted for a job, or None while it is still pending
+        """
+        return await mongodb.database["evaluations"].find_one(
+            {"job_id": job_id},
+            {"_id": 0}
+        )
+
+
+# Global service instance
+voice_job_service = VoiceJobService()
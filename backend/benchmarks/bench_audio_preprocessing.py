@@ -0,0 +1,80 @@
+"""
+Audio preprocessing benchmark: bytes saved and end-to-end transcription latency.
+
+For the bundled test.wav (when it is a valid WAV) and synthetic recordings at
+44.1/48 kHz stereo with leading/trailing silence, reports the preprocessing
+time, input/output sizes and the latency of a transcription call against the
+fake OpenAI server with and without preprocessing. The fake server charges
+`--latency-per-mb` seconds per uploaded MB to model upload/transcription cost.
+
+    cd backend && python -m benchmarks.bench_audio_preprocessing --latency-per-mb 0.5
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from benchmarks.common import synth_wav
+from benchmarks.fake_openai import start_server
+
+TEST_WAV = Path(__file__).resolve().parents[2] / "test.wav"
+
+SYNTHETIC = [
+    ("synthetic_30s_44k_stereo", 30, 44100, 2),
+    ("synthetic_2min_48k_stereo", 120, 48000, 2),
+    ("synthetic_5min_44k_stereo", 300, 44100, 2),
+]
+
+
+async def run(latency: float, latency_per_mb: float, silence: float) -> dict:
+    runner = await start_server(latency=latency, latency_per_mb=latency_per_mb)
+    host, port = runner.addresses[0][:2]
+    os.environ["OPENAI_BASE_URL"] = f"http://{host}:{port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+    from app.services import openai_client
+    from app.services.audio_preprocessing import preprocess_wav
+
+    samples = []
+    if TEST_WAV.exists() and TEST_WAV.read_bytes()[:4] == b"RIFF":
+        samples.append(("test.wav", TEST_WAV.read_bytes()))
+    for name, seconds, rate, channels in SYNTHETIC:
+        samples.append((name, synth_wav(seconds, rate, channels, silence=silence)))
+
+    results = {}
+    for name, data in samples:
+        start = time.perf_counter()
+        processed = await asyncio.to_thread(preprocess_wav, data)
+        preprocess_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await openai_client.transcribe(("a.wav", data, "audio/wav"))
+        raw_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await openai_client.transcribe(("a.wav", processed, "audio/wav"))
+        processed_s = time.perf_counter() - start
+
+        results[name] = {
+            "input_bytes": len(data),
+            "output_bytes": len(processed),
+            "bytes_saved_pct": round(100 * (1 - len(processed) / len(data)), 1),
+            "preprocess_ms": round(preprocess_s * 1000, 1),
+            "end_to_end_raw_ms": round(raw_s * 1000, 1),
+            "end_to_end_preprocessed_ms": round((preprocess_s + processed_s) * 1000, 1),
+        }
+
+    await runner.cleanup()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--latency-per-mb", type=float, default=0.5)
+    parser.add_argument("--silence", type=float, default=3.0, help="seconds of silence on each side")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(json.dumps(asyncio.run(run(args.latency, args.latency_per_mb, args.silence)), indent=2))
@@ -0,0 +1,106 @@
+"""
+Progress dashboard benchmark: history, latest and trends with and without the
+(user_id, created_at) index, and the user_progress rollup read.
+
+Seeds --users users x --per-user evaluations in a scratch database, then times
+each EvaluationService query for random users, first as a collection scan and
+then after evaluation_consumer.ensure_indexes(); finally the rollups are
+rebuilt and the single-document progress read is timed. The scratch database is
+dropped at the end. Needs a reachable MongoDB (MONGODB_URL).
+
+    cd backend && python -m benchmarks.bench_evaluation_history --users 2000 --per-user 200
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+os.environ["MONGODB_DB_NAME"] = "linguamentor_bench"
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+from benchmarks.common import percentiles  # noqa: E402
+from app.database.mongodb import mongodb  # noqa: E402
+from app.services import evaluation_consumer, progress_rollup  # noqa: E402
+from app.services.evaluation_service import evaluation_service  # noqa: E402
+
+CEFR = ["A1", "A2", "B1", "B2", "C1", "C2"]
+
+
+async def seed(users: int, per_user: int) -> list:
+    collection = mongodb.database["evaluations"]
+    user_ids = [f"user{i:06d}" for i in range(users)]
+    start = datetime.utcnow() - timedelta(days=365)
+    batch = []
+    for user_id in user_ids:
+        for n in range(per_user):
+            batch.append({
+                "job_id": f"{user_id}-{n}",
+                "user_id": user_id,
+                "status": "completed" if n % 20 else "failed",
+                "created_at": start + timedelta(hours=random.randrange(365 * 24)),
+                "analysis": {
+                    "grammar_score": random.randint(40, 100),
+                    "pron_score": random.randint(40, 100),
+                    "cefr": random.choice(CEFR),
+                },
+            })
+            if len(batch) >= 10000:
+                await collection.insert_many(batch, ordered=False)
+                batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+    return user_ids
+
+
+async def timed(fn, user_ids: list, samples: int) -> dict:
+    latencies = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        await fn(random.choice(user_ids))
+        latencies.append(time.perf_counter() - start)
+    return percentiles(latencies)
+
+
+async def measure(user_ids: list, samples: int) -> dict:
+    return {
+        "history": await timed(lambda u: evaluation_service.get_history(u, limit=20), user_ids, samples),
+        "latest": await timed(evaluation_service.get_latest, user_ids, samples),
+        "trends_week": await timed(lambda u: evaluation_service.get_trends(u, bucket="week"), user_ids, samples),
+    }
+
+
+async def run(users: int, per_user: int, samples: int) -> dict:
+    await mongodb.connect_to_database()
+    await mongodb.client.drop_database(mongodb.database.name)
+    await mongodb.connect_to_database()
+    user_ids = await seed(users, per_user)
+
+    results = {"evaluations": users * per_user, "collection_scan": await measure(user_ids, samples)}
+    await evaluation_consumer.ensure_indexes()
+    results["indexed"] = await measure(user_ids, samples)
+
+    start = time.perf_counter()
+    await progress_rollup.rebuild(
+        mongodb.database["evaluations"], mongodb.database[progress_rollup.PROGRESS_COLLECTION]
+    )
+    results["rollup_rebuild_s"] = round(time.perf_counter() - start, 2)
+    results["indexed"]["progress_rollup"] = await timed(evaluation_service.get_progress, user_ids, samples)
+
+    evaluation_consumer.close_client()
+    await mongodb.client.drop_database(mongodb.database.name)
+    await mongodb.close_database_connection()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--per-user", type=int, default=200)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(json.dumps(asyncio.run(run(args.users, args.per_user, args.samples)), indent=2))
@@ -0,0 +1,77 @@
+"""
+Evaluation insert throughput: client-per-document insert_one vs BatchWriter.
+
+Needs a reachable MongoDB (MONGODB_URL). Writes into a scratch database that is
+dropped at the end.
+
+    cd backend && MONGODB_URL=mongodb://localhost:27017 python -m benchmarks.bench_evaluation_writer --docs 5000
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+from motor.motor_asyncio import AsyncIOMotorClient
+
+os.environ["MONGODB_DB_NAME"] = "linguamentor_bench"
+
+from app.services import evaluation_consumer  # noqa: E402
+
+
+class _Message:
+    async def ack(self):
+        pass
+
+    async def nack(self, requeue: bool = True):
+        pass
+
+
+def _doc(i: int) -> dict:
+    return {
+        "original_name": f"bench_{i}.wav",
+        "transcription": "my name is john",
+        "analysis": {"grammar_score": 80, "pron_score": 70, "cefr": "A2"},
+    }
+
+
+async def run(docs: int, legacy_docs: int, batch_size: int) -> dict:
+    url = evaluation_consumer.MONGO_URL
+    results = {}
+
+    async def legacy_insert(doc):
+        # patrón anterior: un cliente nuevo por documento
+        client = AsyncIOMotorClient(url)
+        await client[evaluation_consumer.MONGO_DB]["evaluations"].insert_one(doc)
+        client.close()
+
+    start = time.perf_counter()
+    for i in range(legacy_docs):
+        await legacy_insert(_doc(i))
+    elapsed = time.perf_counter() - start
+    results["client_per_document"] = {"seconds": round(elapsed, 3), "docs_per_s": round(legacy_docs / elapsed, 1)}
+
+    writer = evaluation_consumer.BatchWriter(max_items=batch_size)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(docs):
+            await writer.add(_doc(i), _Message())
+        await writer.flush()
+    elapsed = time.perf_counter() - start
+    results["batch_writer"] = {"seconds": round(elapsed, 3), "docs_per_s": round(docs / elapsed, 1)}
+
+    client = AsyncIOMotorClient(url)
+    await client.drop_database(evaluation_consumer.MONGO_DB)
+    client.close()
+    evaluation_consumer.close_client()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--legacy-docs", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.docs, args.legacy_docs, args.batch_size)), indent=2))
@@ -0,0 +1,75 @@
+"""
+Export benchmark: streaming NDJSON vs materializing the whole collection.
+
+Seeds --users documents in a scratch database, then reads them back through
+GET /users/export and through the old approach (every document loaded as a
+UserResponse and dumped as one JSON array), reporting rows per second and
+peak Python memory (tracemalloc). The scratch database is dropped at the end.
+Needs a reachable MongoDB (MONGODB_URL).
+
+    cd backend && python -m benchmarks.bench_export --users 200000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import tracemalloc
+import httpx
+
+os.environ["MONGODB_DB_NAME"] = "linguamentor_bench"
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+from benchmarks.bench_user_pagination import seed  # noqa: E402
+
+
+async def measure(fn) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = await fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"rows": rows, "rows_per_s": round(rows / elapsed), "peak_mb": round(peak / 1024 / 1024, 1)}
+
+
+async def run(users: int) -> dict:
+    from app.main import app
+    from app.database.mongodb import mongodb
+    from app.models.user_model import User, UserResponse
+
+    async with app.router.lifespan_context(app):
+        await mongodb.client.drop_database(mongodb.database.name)
+        await mongodb.connect_to_database()
+        await seed(users)
+
+        async def materialized():
+            # enfoque anterior: toda la colección en memoria y un único arreglo JSON
+            docs = await User.find_all().to_list()
+            body = json.dumps([
+                UserResponse(_id=str(u.id), **u.model_dump(exclude={"id", "revision_id", "hashed_password"})).model_dump(mode="json")
+                for u in docs
+            ])
+            return body.count('"_id"')
+
+        async def streamed():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+                rows = 0
+                async with http.stream("GET", "/users/export") as response:
+                    async for line in response.aiter_lines():
+                        rows += bool(line)
+                return rows
+
+        results = {"materialized": await measure(materialized), "streamed": await measure(streamed)}
+        await mongodb.client.drop_database(mongodb.database.name)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(json.dumps(asyncio.run(run(args.users)), indent=2))
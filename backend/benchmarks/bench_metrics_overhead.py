@@ -0,0 +1,75 @@
+"""
+Instrumentation overhead: cost per event of the metrics layer.
+
+Times, in microseconds per event, a histogram observation with a .labels()
+lookup and on a cached child (as the middleware and the Mongo listener do),
+a counter increment, and one MongoCommandListener.succeeded call. Then compares
+GET /health latency on the real app with and without MetricsMiddleware.
+No external services are needed.
+
+    cd backend && python -m benchmarks.bench_metrics_overhead
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from types import SimpleNamespace
+import httpx
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+from app.services import metrics  # noqa: E402
+
+
+def per_event_us(fn, events: int) -> float:
+    start = time.perf_counter()
+    for _ in range(events):
+        fn()
+    return round((time.perf_counter() - start) / events * 1e6, 3)
+
+
+async def health_us(app, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        await http.get("/health")
+        start = time.perf_counter()
+        for _ in range(requests):
+            await http.get("/health")
+        return round((time.perf_counter() - start) / requests * 1e6, 1)
+
+
+async def run(events: int, requests: int) -> dict:
+    from fastapi import FastAPI
+    from app.main import health_check
+
+    event = SimpleNamespace(command_name="find", duration_micros=850)
+    results = {
+        "histogram_labels_observe_us": per_event_us(
+            lambda: metrics.HTTP_REQUEST_DURATION.labels("GET", "/bench", "200").observe(0.001), events
+        ),
+        "histogram_cached_child_observe_us": per_event_us(
+            lambda child=metrics.HTTP_REQUEST_DURATION.labels("GET", "/bench", "200"): child.observe(0.001), events
+        ),
+        "counter_inc_us": per_event_us(lambda: metrics.QUEUE_PUBLISHED.labels("bench").inc(), events),
+        "mongo_listener_us": per_event_us(lambda: metrics.mongo_command_listener.succeeded(event), events),
+    }
+
+    plain = FastAPI()
+    plain.get("/health")(health_check)
+    instrumented = FastAPI()
+    instrumented.get("/health")(health_check)
+    instrumented.add_middleware(metrics.MetricsMiddleware)
+    results["health_plain_us"] = await health_us(plain, requests)
+    results["health_instrumented_us"] = await health_us(instrumented, requests)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(json.dumps(asyncio.run(run(args.events, args.requests)), indent=2))
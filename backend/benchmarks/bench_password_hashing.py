@@ -0,0 +1,107 @@
+"""
+Signup storm benchmark: Argon2 inline on the event loop vs on the process pool.
+
+Runs N concurrent signups while probing GET /health and reports signups per
+second and /health latency. By default a signup is just the password hash
+(no database needed). With --mongodb the storm goes through POST /users/ with
+the app lifespan connected to MONGODB_URL and a scratch database that is
+dropped at the end; that mode measures the pooled path only.
+
+    cd backend && python -m benchmarks.bench_password_hashing --signups 200
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+import httpx
+from benchmarks.common import percentiles
+
+
+async def storm(app, signup, signups: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        health = []
+        done = asyncio.Event()
+
+        async def probe():
+            # latencia medida desde el instante previsto del envío: incluye los bloqueos del loop
+            while not done.is_set():
+                start = time.perf_counter() + 0.01
+                await asyncio.sleep(0.01)
+                await http.get("/health")
+                health.append(time.perf_counter() - start)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i: int):
+            async with semaphore:
+                await signup(http, i)
+
+        prober = asyncio.create_task(probe())
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(signups)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+
+    return {
+        "signups_per_s": round(signups / elapsed, 1),
+        "health_latency_ms": percentiles(health),
+        "health_probes": len(health),
+    }
+
+
+async def run(signups: int, concurrency: int, with_mongodb: bool) -> dict:
+    if with_mongodb:
+        os.environ["MONGODB_DB_NAME"] = "linguamentor_bench"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+    from app.main import app
+    from app.services import password_hashing
+    from app.services.user_service import UserService
+
+    results = {}
+
+    if not with_mongodb:
+        async def inline(http, i):
+            # comportamiento anterior: Argon2 síncrono dentro de la corrutina
+            UserService.hash_password(f"password-{i}")
+
+        async def pooled(http, i):
+            await password_hashing.hash_password_async(f"password-{i}")
+
+        results["inline"] = await storm(app, inline, signups, concurrency)
+        results["process_pool"] = await storm(app, pooled, signups, concurrency)
+    else:
+        from app.database.mongodb import mongodb
+        run_id = uuid.uuid4().hex[:8]
+
+        async def signup(http, i):
+            await http.post("/users/", json={
+                "email": f"bench{run_id}{i}@example.com",
+                "username": f"bench{run_id}{i}",
+                "full_name": "Bench User",
+                "password": f"password-{i}",
+            })
+
+        async with app.router.lifespan_context(app):
+            results["signup_process_pool"] = await storm(app, signup, signups, concurrency)
+            await mongodb.client.drop_database(mongodb.database.name)
+
+    password_hashing.shutdown_pool()
+    results["workers"] = password_hashing.settings.PASSWORD_HASH_WORKERS
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--signups", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--mongodb", action="store_true", help="go through POST /users/ with MongoDB")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(json.dumps(asyncio.run(run(args.signups, args.concurrency, args.mongodb)), indent=2))
@@ -0,0 +1,79 @@
+"""
+Publish throughput: connect-per-message send_message vs the pooled publisher.
+
+Needs a reachable RabbitMQ (RABBITMQ_URL or RABBITMQ_USER/PASS/HOST). Messages
+go to a scratch queue that is purged and deleted at the end.
+
+    cd backend && RABBITMQ_HOST=localhost python -m benchmarks.bench_rabbitmq_publish --messages 2000
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import time
+import aio_pika
+from app.config import settings
+from app.services.rabbitmq_utils import RabbitMQPublisher, send_message
+
+QUEUE = "bench_publish"
+
+
+async def timed(coro_factory, messages: int) -> dict:
+    start = time.perf_counter()
+    await coro_factory()
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 3), "msg_per_s": round(messages / elapsed, 1)}
+
+
+async def run(messages: int, concurrency: int, legacy_messages: int) -> dict:
+    payload = {"job_id": "bench", "filepath": "/tmp/bench.wav", "original_name": "bench.wav", "size": 1}
+    results = {}
+
+    async def legacy():
+        # send_message imprime cada mensaje; se descarta la salida para medir solo el envío
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(legacy_messages):
+                await send_message(QUEUE, payload)
+
+    results["send_message"] = await timed(legacy, legacy_messages)
+
+    for confirms in (True, False):
+        publisher = RabbitMQPublisher(pool_size=concurrency, confirms=confirms)
+        await publisher.connect()
+        label = "confirms" if confirms else "no_confirms"
+
+        async def pooled():
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one():
+                async with semaphore:
+                    await publisher.publish(QUEUE, payload)
+
+            await asyncio.gather(*(one() for _ in range(messages)))
+
+        async def batched():
+            await publisher.publish_batch(QUEUE, [payload] * messages)
+
+        results[f"pooled_{label}"] = await timed(pooled, messages)
+        results[f"batch_{label}"] = await timed(batched, messages)
+        await publisher.close()
+
+    connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
+    async with connection:
+        channel = await connection.channel()
+        await channel.queue_delete(QUEUE)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--legacy-messages", type=int, default=200,
+                        help="send_message is slow, use a smaller sample for it")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(json.dumps(asyncio.run(run(args.messages, args.concurrency, args.legacy_messages)), indent=2))
@@ -0,0 +1,94 @@
+"""
+Cohort import benchmark: one POST /users/ per user vs a single POST /users/bulk.
+
+By default only the hashing stage is measured (no database needed): one pool
+call per password vs hash_passwords_async in chunks. With --mongodb both
+endpoints run against MONGODB_URL through the app lifespan, using a scratch
+database that is dropped at the end.
+
+    cd backend && python -m benchmarks.bench_user_bulk_import --users 10000 --mongodb
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+import httpx
+
+
+def cohort(users: int, prefix: str) -> list:
+    return [
+        {
+            "email": f"{prefix}{i}@example.com",
+            "username": f"{prefix}{i}",
+            "full_name": "Bench Student",
+            "password": f"password-{i}",
+            "language_preferences": [{"language": "english"}],
+        }
+        for i in range(users)
+    ]
+
+
+async def run(users: int, concurrency: int, with_mongodb: bool) -> dict:
+    if with_mongodb:
+        os.environ["MONGODB_DB_NAME"] = "linguamentor_bench"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+    from app.main import app
+    from app.services import password_hashing
+
+    results = {"users": users, "workers": password_hashing.settings.PASSWORD_HASH_WORKERS}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    if not with_mongodb:
+        passwords = [f"password-{i}" for i in range(users)]
+
+        async def one(password):
+            async with semaphore:
+                await password_hashing.hash_password_async(password)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(p) for p in passwords))
+        results["per_password_s"] = round(time.perf_counter() - start, 2)
+
+        start = time.perf_counter()
+        await password_hashing.hash_passwords_async(passwords)
+        results["chunked_s"] = round(time.perf_counter() - start, 2)
+    else:
+        from app.database.mongodb import mongodb
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+                single = cohort(users, f"s{uuid.uuid4().hex[:6]}")
+
+                async def signup(row):
+                    async with semaphore:
+                        await http.post("/users/", json=row)
+
+                start = time.perf_counter()
+                await asyncio.gather(*(signup(row) for row in single))
+                results["single_posts_s"] = round(time.perf_counter() - start, 2)
+
+                body = "\n".join(json.dumps(row) for row in cohort(users, f"b{uuid.uuid4().hex[:6]}"))
+                start = time.perf_counter()
+                response = await http.post(
+                    "/users/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}
+                )
+                results["bulk_s"] = round(time.perf_counter() - start, 2)
+                results["bulk_created"] = response.json().get("created")
+            await mongodb.client.drop_database(mongodb.database.name)
+
+    password_hashing.shutdown_pool()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--mongodb", action="store_true", help="go through the HTTP endpoints with MongoDB")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(json.dumps(asyncio.run(run(args.users, args.concurrency, args.mongodb)), indent=2))
@@ -0,0 +1,104 @@
+"""
+Profile read benchmark: GET /users/{id} through the user cache vs straight to MongoDB.
+
+Seeds --users documents in a scratch database, then issues --requests reads
+with --concurrency in flight, drawn from a hot set of --hot IDs. Reports
+throughput, latency and, for the cached path, how many reads reached MongoDB
+(cache loads) and how many concurrent misses were coalesced. The scratch
+database is dropped at the end. Needs a reachable MongoDB (MONGODB_URL).
+
+    cd backend && python -m benchmarks.bench_user_cache --requests 20000 --hot 200
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from datetime import datetime
+
+os.environ["MONGODB_DB_NAME"] = "linguamentor_bench"
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+from beanie import PydanticObjectId  # noqa: E402
+from benchmarks.common import percentiles  # noqa: E402
+from app.database.mongodb import mongodb  # noqa: E402
+from app.models.user_model import User, UserResponse  # noqa: E402
+from app.services.user_cache import user_cache  # noqa: E402
+from app.services.user_service import user_service  # noqa: E402
+
+
+async def seed(users: int) -> list:
+    now = datetime.utcnow()
+    result = await User.get_motor_collection().insert_many([
+        {
+            "email": f"user{i}@example.com",
+            "username": f"user{i}",
+            "full_name": "Bench User",
+            "hashed_password": "$argon2id$fake",
+            "language_preferences": [{"language": "english", "current_level": "beginner", "target_level": "intermediate"}],
+            "is_active": True,
+            "is_verified": False,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(users)
+    ])
+    return [str(oid) for oid in result.inserted_ids]
+
+
+async def direct(user_id: str):
+    # camino anterior: documento completo y UserResponse armado campo a campo
+    user = await User.get(PydanticObjectId(user_id))
+    return UserResponse(
+        _id=str(user.id), email=user.email, username=user.username, full_name=user.full_name,
+        language_preferences=user.language_preferences, is_active=user.is_active,
+        is_verified=user.is_verified, created_at=user.created_at, updated_at=user.updated_at,
+    )
+
+
+async def load(read, ids: list, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(user_id: str):
+        async with semaphore:
+            start = time.perf_counter()
+            await read(user_id)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(random.choice(ids)) for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {"reads_per_s": round(requests / elapsed, 1), "latency_ms": percentiles(latencies)}
+
+
+async def run(users: int, hot: int, requests: int, concurrency: int) -> dict:
+    await mongodb.connect_to_database()
+    await mongodb.client.drop_database(mongodb.database.name)
+    await mongodb.connect_to_database()
+    ids = (await seed(users))[:hot]
+
+    results = {
+        "direct": await load(direct, ids, requests, concurrency),
+        "cached": await load(user_service.get_user_by_id, ids, requests, concurrency),
+    }
+    stats = user_cache.stats()
+    results["cached"].update(mongo_reads=stats["loads"], coalesced=stats["coalesced"],
+                             hit_ratio=stats["memory"]["hit_ratio"])
+
+    await mongodb.client.drop_database(mongodb.database.name)
+    await mongodb.close_database_connection()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--hot", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(json.dumps(asyncio.run(run(args.users, args.hot, args.requests, args.concurrency)), indent=2))
@@ -0,0 +1,102 @@
+"""
+GET /users pagination benchmark: skip/limit vs keyset cursor at increasing depth.
+
+Seeds a scratch database with --users documents (raw insert_many, fake hashes),
+then times fetching one page of --limit users at several page depths with the
+old skip() query and with UserService.get_all_users(cursor=...). The scratch
+database is dropped at the end. Needs a reachable MongoDB (MONGODB_URL).
+
+    cd backend && MONGODB_URL=mongodb://localhost:27017 python -m benchmarks.bench_user_pagination --users 1000000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+os.environ["MONGODB_DB_NAME"] = "linguamentor_bench"
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+from app.database.mongodb import mongodb  # noqa: E402
+from app.models.user_model import User  # noqa: E402
+from app.services.user_service import encode_cursor, user_service  # noqa: E402
+
+PAGES = (1, 100, 1000, 10000)
+
+
+async def seed(users: int):
+    collection = User.get_motor_collection()
+    now = datetime.utcnow()
+    batch = 10000
+    for offset in range(0, users, batch):
+        await collection.insert_many([
+            {
+                "email": f"user{i}@example.com",
+                "username": f"user{i}",
+                "full_name": "Bench User",
+                "hashed_password": "$argon2id$fake",
+                "language_preferences": [{"language": "english", "current_level": "beginner", "target_level": "intermediate"}],
+                "is_active": True,
+                "is_verified": False,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(offset, min(users, offset + batch))
+        ], ordered=False)
+
+
+async def median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return round(samples[len(samples) // 2] * 1000, 2)
+
+
+async def run(users: int, limit: int, repeat: int) -> dict:
+    await mongodb.connect_to_database()
+    await mongodb.client.drop_database(mongodb.database.name)
+    await mongodb.connect_to_database()
+    await seed(users)
+    collection = User.get_motor_collection()
+
+    results = {}
+    for page in PAGES:
+        skip = (page - 1) * limit
+        if skip >= users:
+            break
+
+        async def with_skip():
+            # consulta anterior: documentos completos y skip lineal
+            await User.find_all().skip(skip).limit(limit).to_list()
+
+        cursor = None
+        if skip:
+            previous = await collection.find({}, {"_id": 1}).sort("_id", 1).skip(skip - 1).limit(1).to_list(1)
+            cursor = encode_cursor(previous[0]["_id"])
+
+        async def with_cursor():
+            await user_service.get_all_users(cursor=cursor, limit=limit)
+
+        results[f"page_{page}"] = {
+            "skip_ms": await median_ms(with_skip, repeat),
+            "cursor_ms": await median_ms(with_cursor, repeat),
+        }
+
+    await mongodb.client.drop_database(mongodb.database.name)
+    await mongodb.close_database_connection()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(json.dumps(asyncio.run(run(args.users, args.limit, args.repeat)), indent=2))
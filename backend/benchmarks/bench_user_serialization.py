@@ -0,0 +1,115 @@
+"""
+Serialization micro-benchmark: requests per second on GET /users/?limit=100.
+
+"before" rebuilds the previous path: a UserResponse per document, a UserPage,
+response_model re-validation and the stdlib JSON encoder. "after" is the real
+app route (raw documents -> orjson bytes). Both read the same in-memory page
+of documents so only the per-request CPU differs; no MongoDB is needed.
+
+    cd backend && python -m benchmarks.bench_user_serialization --requests 2000
+"""
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import os
+import time
+from datetime import datetime
+import httpx
+from bson import ObjectId
+from fastapi import FastAPI
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+from app.main import app  # noqa: E402
+from app.models.user_model import User, UserPage, UserResponse  # noqa: E402
+
+
+def make_docs(count: int) -> list:
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "email": f"user{i}@example.com",
+            "username": f"user{i}",
+            "full_name": "Bench User",
+            "language_preferences": [{"language": "english", "current_level": "beginner", "target_level": "intermediate"}],
+            "is_active": True,
+            "is_verified": False,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+class MemoryCursor:
+    """Lo mínimo de un cursor Motor para get_all_users: sort / limit / to_list"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def limit(self, n):
+        return MemoryCursor(self.docs[:n])
+
+    async def to_list(self, length):
+        # Motor entrega documentos nuevos en cada consulta
+        return copy.deepcopy(self.docs[:length])
+
+
+class MemoryCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, *args, **kwargs):
+        return MemoryCursor(self.docs)
+
+
+def before_app(docs) -> FastAPI:
+    before = FastAPI()
+
+    @before.get("/users/", response_model=UserPage)
+    async def get_all_users(limit: int = 100):
+        rows = copy.deepcopy(docs[:limit])
+        return UserPage(items=[UserResponse(_id=str(doc.pop("_id")), **doc) for doc in rows])
+
+    return before
+
+
+async def rps(target: FastAPI, requests: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=target)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        response = await http.get("/users/?limit=100")
+        assert response.status_code == 200 and len(response.json()["items"]) == 100
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                await http.get("/users/?limit=100")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+    return {"requests_per_s": round(requests / elapsed, 1), "bytes": len(response.content)}
+
+
+async def run(requests: int, concurrency: int) -> dict:
+    docs = make_docs(101)
+    User.get_motor_collection = classmethod(lambda cls: MemoryCollection(docs))
+    return {
+        "before": await rps(before_app(docs), requests, concurrency),
+        "after": await rps(app, requests, concurrency),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(json.dumps(asyncio.run(run(args.requests, args.concurrency)), indent=2))
@@ -0,0 +1,77 @@
+"""
+Concurrency benchmark for POST /voice/analyze-voice against the fake OpenAI server.
+
+Fires N concurrent analyses while probing GET /health, and reports total wall
+time plus /health latency. With the async client the wall time stays close to
+two fake round trips and /health is unaffected; with a blocking client it grows
+linearly with N.
+
+    cd backend && python -m benchmarks.bench_voice_concurrency --requests 50 --latency 1
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import httpx
+from benchmarks.common import percentiles, synth_wav
+from benchmarks.fake_openai import start_server
+
+
+async def run(requests: int, latency: float):
+    runner = await start_server(latency=latency)
+    host, port = runner.addresses[0][:2]
+    os.environ["OPENAI_BASE_URL"] = f"http://{host}:{port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+    # importar después de apuntar el cliente al servidor falso
+    from app.main import app
+
+    audio = synth_wav(seconds=5)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        health_latencies = []
+        done = asyncio.Event()
+
+        async def probe_health():
+            while not done.is_set():
+                start = time.perf_counter()
+                await http.get("/health")
+                health_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.05)
+
+        async def analyze():
+            start = time.perf_counter()
+            resp = await http.post(
+                "/voice/analyze-voice",
+                files={"file": ("bench.wav", audio, "audio/wav")},
+            )
+            return resp.status_code, time.perf_counter() - start
+
+        prober = asyncio.create_task(probe_health())
+        start = time.perf_counter()
+        results = await asyncio.gather(*(analyze() for _ in range(requests)))
+        wall = time.perf_counter() - start
+        done.set()
+        await prober
+
+    await runner.cleanup()
+
+    return {
+        "requests": requests,
+        "fake_latency_s": latency,
+        "wall_time_s": round(wall, 3),
+        "ok": sum(1 for code, _ in results if code == 200),
+        "analyze_latency_ms": percentiles([d for _, d in results]),
+        "health_latency_ms": percentiles(health_latencies),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=1.0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(json.dumps(asyncio.run(run(args.requests, args.latency)), indent=2))
@@ -0,0 +1,115 @@
+"""
+Fair dispatch benchmark for the voice worker: one user's burst vs another user's job.
+
+Runs the real voice_analysis_ai.consume (prefetch, lanes, LaneScheduler) on the
+in-memory broker, with handle_message replaced by a job of staggered length
+(so slots free up one at a time) that records when each job starts. User A
+queues a burst of interactive jobs; once they occupy the worker, user B queues
+one job. The report shows how long B waited, how many of A's jobs were running
+when it started and how many of A's held jobs went before it, for three setups:
+
+    current     VOICE_USER_MAX_IN_FLIGHT cap + VOICE_INTERACTIVE_HOLD room
+    no_hold     same cap, prefetch = concurrency (held messages fill the window)
+    no_cap      neither (plain FIFO up to the prefetch)
+
+    cd backend && python -m benchmarks.bench_voice_fairness --burst 20 --concurrency 16 --job-seconds 1
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter
+
+os.environ["VOICE_WORKER_METRICS_PORT"] = "0"
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+# sin MongoDB el worker sigue (solo usa Mongo para cachés): que falle rápido
+os.environ.setdefault("MONGODB_URL", "mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=200")
+
+import aio_pika
+from app.config import settings
+from app.services import voice_analysis_ai
+from app.services.fair_scheduling import FAIR_KEY_HEADER
+from benchmarks.memory_broker import MemoryBroker
+
+
+async def run_case(burst: int, concurrency: int, job_seconds: float, cap: int, hold: int) -> dict:
+    settings.VOICE_USER_MAX_IN_FLIGHT = cap
+    settings.VOICE_INTERACTIVE_HOLD = hold
+    broker = MemoryBroker()
+    broker.install()
+
+    running = Counter()
+    starts = []
+
+    async def fake_job(message, channel, queue=voice_analysis_ai.QUEUE_INPUT):
+        async with message.process(requeue=True):
+            key = message.headers.get(FAIR_KEY_HEADER)
+            starts.append((time.perf_counter(), key, running["A"]))
+            running[key] += 1
+            try:
+                # duraciones escalonadas: los huecos se liberan de a uno
+                await asyncio.sleep(job_seconds * (1 + len(starts) / concurrency))
+            finally:
+                running[key] -= 1
+
+    voice_analysis_ai.handle_message = fake_job
+    worker = asyncio.create_task(voice_analysis_ai.consume(concurrency))
+    while not broker.queues.get(voice_analysis_ai.QUEUE_INPUT) or \
+            not broker.queues[voice_analysis_ai.QUEUE_INPUT].consumers:
+        await asyncio.sleep(0.01)
+
+    connection = await aio_pika.connect_robust()
+    channel = await connection.channel()
+
+    async def publish(key: str):
+        await channel.default_exchange.publish(
+            aio_pika.Message(body=b"{}", headers={FAIR_KEY_HEADER: key}),
+            routing_key=voice_analysis_ai.QUEUE_INPUT,
+        )
+
+    for _ in range(burst):
+        await publish("A")
+    while running["A"] < min(burst, concurrency):
+        await asyncio.sleep(0.01)
+    b_published = time.perf_counter()
+    await publish("B")
+    while len(starts) < burst + 1:
+        await asyncio.sleep(0.01)
+
+    await connection.close()
+    worker.cancel()
+    await asyncio.gather(worker, return_exceptions=True)
+
+    b_index = next(i for i, (_, key, _) in enumerate(starts) if key == "B")
+    b_start, _, a_running = starts[b_index]
+    return {
+        "cap": cap,
+        "prefetch": concurrency + hold,
+        "b_wait_s": round(b_start - b_published, 3),
+        "a_running_at_b_start": a_running,
+        "a_held_started_before_b": b_index - min(burst, concurrency),
+    }
+
+
+async def run(burst: int, concurrency: int, job_seconds: float) -> dict:
+    cases = {
+        "current": (settings.VOICE_USER_MAX_IN_FLIGHT, settings.VOICE_INTERACTIVE_HOLD),
+        "no_hold": (settings.VOICE_USER_MAX_IN_FLIGHT, 0),
+        "no_cap": (0, 0),
+    }
+    report = {"burst": burst, "concurrency": concurrency, "job_seconds": job_seconds}
+    for name, (cap, hold) in cases.items():
+        report[name] = await run_case(burst, concurrency, job_seconds, cap, hold)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--burst", type=int, default=20, help="interactive jobs queued by user A")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--job-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(json.dumps(asyncio.run(run(args.burst, args.concurrency, args.job_seconds)), indent=2))
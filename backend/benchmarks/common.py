@@ -0,0 +1,39 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+import io
+import math
+import wave
+import numpy as np
+
+
+def synth_wav(seconds: float = 5.0, sample_rate: int = 16000, channels: int = 1,
+              silence: float = 0.0) -> bytes:
+    """
+    Build a 16-bit PCM WAV with a voiced tone, padded with `silence` seconds on each side
+    """
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    tone = 0.3 * np.sin(2 * math.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * math.pi * 3 * t))
+    pad = np.zeros(int(silence * sample_rate))
+    signal = np.concatenate([pad, tone, pad])
+    pcm = (signal * 32767).astype("<i2")
+    if channels > 1:
+        pcm = np.repeat(pcm[:, None], channels, axis=1)
+
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+def percentiles(samples, points=(50, 95, 99)) -> dict:
+    """
+    Latency summary in milliseconds for a list of durations in seconds
+    """
+    if not samples:
+        return {f"p{p}": None for p in points}
+    arr = np.asarray(samples) * 1000
+    return {f"p{p}": round(float(np.percentile(arr, p)), 2) for p in points}
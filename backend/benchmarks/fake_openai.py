@@ -0,0 +1,130 @@
+"""
+Local stand-in for the OpenAI HTTP API used by the benchmarks.
+
+Serves /v1/audio/transcriptions and /v1/chat/completions with a configurable
+latency so the voice path can be measured without network access or cost.
+Optional profiles: lognormal jitter around the latency, a share of 500s and a
+share of 429s (with retry-after-ms, like the real API), and per-request
+distinct transcriptions so the analysis cache does not absorb the load.
+
+    python -m benchmarks.fake_openai --port 8765 --latency 1.5 --jitter 0.3 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from typing import Optional
+from aiohttp import web
+
+FAKE_ANALYSIS = {
+    "transcription": "my name is john and i like to learn english",
+    "correction": "My name is John and I like learning English.",
+    "pronunciation_issues": ["learn"],
+    "grammar_score": 80,
+    "pron_score": 75,
+    "cefr": "A2",
+    "feedback_text": "Buen trabajo.",
+}
+
+
+def build_app(latency: float = 1.0, latency_per_mb: float = 0.0, jitter: float = 0.0,
+              error_rate: float = 0.0, rate_limit_rate: float = 0.0, unique_text: bool = False,
+              seed: Optional[int] = None) -> web.Application:
+    """
+    Build the fake OpenAI application, every call sleeps `latency` seconds
+    (times a lognormal factor of sigma `jitter`); transcriptions add
+    `latency_per_mb` seconds per MB of uploaded audio. `error_rate` and
+    `rate_limit_rate` are the shares of calls answered with 500 and 429
+    """
+    stats = {"transcriptions": 0, "completions": 0, "errors": 0, "rate_limited": 0}
+    rng = random.Random(seed)
+    takes = itertools.count(1)
+
+    async def delay(seconds: float):
+        await asyncio.sleep(seconds * rng.lognormvariate(0, jitter) if jitter else seconds)
+
+    def injected_failure() -> Optional[web.Response]:
+        roll = rng.random()
+        if roll < rate_limit_rate:
+            stats["rate_limited"] += 1
+            return web.json_response(
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                status=429, headers={"retry-after-ms": "200"},
+            )
+        if roll < rate_limit_rate + error_rate:
+            stats["errors"] += 1
+            return web.json_response(
+                {"error": {"message": "The server had an error", "type": "server_error", "code": None}},
+                status=500,
+            )
+        return None
+
+    async def transcriptions(request: web.Request):
+        body = await request.read()
+        await delay(latency + latency_per_mb * len(body) / (1024 * 1024))
+        failure = injected_failure()
+        if failure is not None:
+            return failure
+        stats["transcriptions"] += 1
+        text = FAKE_ANALYSIS["transcription"]
+        return web.json_response({"text": f"{text} take {next(takes)}" if unique_text else text})
+
+    async def completions(request: web.Request):
+        body = await request.json()
+        await delay(latency)
+        failure = injected_failure()
+        if failure is not None:
+            return failure
+        stats["completions"] += 1
+        return web.json_response({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o-mini"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": json.dumps(FAKE_ANALYSIS)},
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        })
+
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app["stats"] = stats
+    app.router.add_post("/v1/audio/transcriptions", transcriptions)
+    app.router.add_post("/v1/chat/completions", completions)
+    return app
+
+
+async def start_server(host: str = "127.0.0.1", port: int = 0, latency: float = 1.0,
+                       latency_per_mb: float = 0.0, **profile) -> web.AppRunner:
+    """
+    Start the fake server in the running loop; the bound port is in
+    runner.addresses and the call counters in runner.app["stats"].
+    `profile` takes the jitter / error keyword arguments of build_app
+    """
+    runner = web.AppRunner(build_app(latency, latency_per_mb, **profile))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--latency-per-mb", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0, help="lognormal sigma of the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of calls answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of calls answered with 429")
+    parser.add_argument("--unique-text", action="store_true", help="a distinct transcription per call")
+    args = parser.parse_args()
+    web.run_app(
+        build_app(args.latency, args.latency_per_mb, args.jitter, args.error_rate,
+                  args.rate_limit_rate, args.unique_text),
+        host=args.host, port=args.port,
+    )
@@ -0,0 +1,418 @@
+"""
+End-to-end load test: API, voice worker and evaluation consumer in one process.
+
+Runs the FastAPI app (through httpx's ASGI transport, with its lifespan), the
+voice worker and the evaluation consumer against the fake OpenAI server and
+an in-memory broker (or a real RabbitMQ with --broker amqp). MongoDB is the
+one at MONGODB_URL, or a throwaway mongod started from --mongod; the scratch
+database linguamentor_bench is dropped before and after the run.
+
+A weighted mix of operations is driven for --duration seconds, closed loop
+with --concurrency clients or open loop at --rate requests/s (latency then
+counts from the scheduled start, so queuing in the client is not hidden).
+After the load phase the harness waits for the queued voice jobs to be
+stored and reports per-operation throughput and p50/p95/p99, the per-stage
+breakdown of the voice jobs from their traces, and the queue backlog over
+time, as JSON (--output to also write it to a file).
+
+    cd backend && MONGODB_URL=mongodb://localhost:27017 python -m benchmarks.load_test \\
+        --duration 30 --concurrency 20 --mix get_user=50,list_users=10,create_user=10,voice_job=20,history=10
+    cd backend && python -m benchmarks.load_test --mongod $(which mongod) --rate 40 --latency 0.8 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+import httpx
+from benchmarks.common import percentiles, synth_wav
+from benchmarks.fake_openai import start_server
+
+BENCH_DB = "linguamentor_bench"
+QUEUES = ("voice_analysis", "voice_analysis_bulk", "feedback_ready")
+DEFAULT_MIX = "get_user=50,list_users=10,create_user=10,delete_user=2,voice_job=10,voice_bulk=10,history=8"
+
+os.environ["MONGODB_DB_NAME"] = BENCH_DB
+# sin servidores de métricas de los workers: todo corre en este proceso
+os.environ["VOICE_WORKER_METRICS_PORT"] = "0"
+os.environ["EVALUATION_CONSUMER_METRICS_PORT"] = "0"
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise SystemExit(f"Unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+@contextlib.asynccontextmanager
+async def local_mongod(binary: str):
+    """mongod temporal en un puerto libre con un dbpath descartable"""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    import socket
+
+    dbpath = tempfile.mkdtemp(prefix="linguamentor-mongod-")
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    proc = subprocess.Popen(
+        [binary, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"mongodb://127.0.0.1:{port}"
+    try:
+        client = AsyncIOMotorClient(url, serverSelectionTimeoutMS=15000)
+        await client.admin.command("ping")
+        client.close()
+        yield url
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        shutil.rmtree(dbpath, ignore_errors=True)
+
+
+class Workload:
+    """Estado compartido por los clientes: usuarios conocidos, jobs y muestras"""
+
+    def __init__(self, http: httpx.AsyncClient, clips: List[bytes], rng: random.Random):
+        self.http = http
+        self.clips = clips
+        self.rng = rng
+        # los primeros `seed_users` de user_ids son los sembrados, que nunca se borran
+        self.seed_users = 0
+        self.user_ids: List[str] = []
+        self.job_ids: List[str] = []
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, op: str, status: int, seconds: float):
+        self.statuses[op][status] += 1
+        if 200 <= status < 300:
+            self.samples[op].append(seconds)
+
+    def user_payload(self) -> dict:
+        name = uuid.uuid4().hex[:12]
+        return {
+            "email": f"{name}@bench.example.com",
+            "username": f"bench_{name}",
+            "full_name": "Bench User",
+            "password": "bench-password-123",
+            "language_preferences": [{"language": "english"}],
+        }
+
+    def some_user(self) -> Optional[str]:
+        return self.rng.choice(self.user_ids) if self.user_ids else None
+
+
+async def op_create_user(w: Workload) -> int:
+    response = await w.http.post("/users/", json=w.user_payload())
+    if response.status_code == 201:
+        w.user_ids.append(response.json()["_id"])
+    return response.status_code
+
+
+async def op_get_user(w: Workload) -> int:
+    return (await w.http.get(f"/users/{w.some_user()}")).status_code
+
+
+async def op_list_users(w: Workload) -> int:
+    return (await w.http.get("/users/", params={"limit": 50})).status_code
+
+
+async def op_delete_user(w: Workload) -> int:
+    # los usuarios sembrados se conservan: los jobs los siguen referenciando
+    if len(w.user_ids) <= w.seed_users:
+        return await op_get_user(w)
+    user_id = w.user_ids.pop(w.rng.randrange(w.seed_users, len(w.user_ids)))
+    return (await w.http.delete(f"/users/{user_id}")).status_code
+
+
+async def op_voice_job(w: Workload) -> int:
+    response = await w.http.post(
+        "/voice/jobs",
+        files={"file": ("bench.wav", w.rng.choice(w.clips), "audio/wav")},
+        data={"user_id": w.rng.choice(w.user_ids[1:w.seed_users] or w.user_ids)},
+    )
+    if response.status_code == 202:
+        w.job_ids.append(response.json()["job_id"])
+    return response.status_code
+
+
+async def op_voice_bulk(w: Workload) -> int:
+    # una "escuela": siempre el mismo usuario subiendo grabaciones en lote
+    response = await w.http.post(
+        "/voice/jobs",
+        files={"file": ("batch.wav", w.rng.choice(w.clips), "audio/wav")},
+        data={"user_id": w.user_ids[0], "bulk": "true"},
+    )
+    if response.status_code == 202:
+        w.job_ids.append(response.json()["job_id"])
+    return response.status_code
+
+
+async def op_history(w: Workload) -> int:
+    user_id = w.rng.choice(w.user_ids[:w.seed_users])
+    return (await w.http.get(f"/evaluations/users/{user_id}/history", params={"limit": 20})).status_code
+
+
+OPERATIONS = {
+    "create_user": op_create_user,
+    "get_user": op_get_user,
+    "list_users": op_list_users,
+    "delete_user": op_delete_user,
+    "voice_job": op_voice_job,
+    "voice_bulk": op_voice_bulk,
+    "history": op_history,
+}
+
+
+async def timed(w: Workload, op: str, started: float):
+    try:
+        status = await OPERATIONS[op](w)
+    except Exception:
+        status = 0
+    w.record(op, status, time.perf_counter() - started)
+
+
+async def closed_loop(w: Workload, weights: Dict[str, float], concurrency: int, duration: float):
+    ops, odds = list(weights), list(weights.values())
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        while time.perf_counter() < deadline:
+            await timed(w, w.rng.choices(ops, odds)[0], time.perf_counter())
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+
+
+async def open_loop(w: Workload, weights: Dict[str, float], rate: float, duration: float):
+    ops, odds = list(weights), list(weights.values())
+    start = time.perf_counter()
+    tasks = set()
+    scheduled = start
+    while scheduled < start + duration:
+        # llegadas de Poisson; la latencia cuenta desde el instante programado
+        scheduled += w.rng.expovariate(rate)
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        task = asyncio.create_task(timed(w, w.rng.choices(ops, odds)[0], scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.wait(tasks)
+
+
+async def sample_backlog(samples: Dict[str, list], interval: float, stop: asyncio.Event):
+    """Profundidad de cada cola por declare pasivo, igual contra RabbitMQ o el broker en memoria"""
+    import aio_pika
+    from app.config import settings
+
+    connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
+    try:
+        channel = await connection.channel()
+        for name in QUEUES:
+            # idempotente: mismos argumentos que los workers
+            await channel.declare_queue(name, durable=True)
+        start = time.perf_counter()
+        while not stop.is_set():
+            elapsed = round(time.perf_counter() - start, 2)
+            for name in QUEUES:
+                queue = await channel.declare_queue(name, durable=True, passive=True)
+                samples[name].append([elapsed, queue.declaration_result.message_count])
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(stop.wait(), interval)
+    finally:
+        await connection.close()
+
+
+def backlog_summary(samples: List[list]) -> dict:
+    depths = [depth for _, depth in samples] or [0]
+    return {
+        "max": max(depths),
+        "mean": round(sum(depths) / len(depths), 1),
+        "final": depths[-1],
+        "samples": samples,
+    }
+
+
+async def wait_for_jobs(collection, job_ids: List[str], timeout: float) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if await collection.count_documents({"job_id": {"$in": job_ids}}) >= len(job_ids):
+            break
+        await asyncio.sleep(0.25)
+    return round(time.perf_counter() - start, 2)
+
+
+async def run(args) -> dict:
+    weights = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+
+    fake = await start_server(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, unique_text=True, seed=args.seed,
+    )
+    host, port = fake.addresses[0][:2]
+    os.environ["OPENAI_BASE_URL"] = f"http://{host}:{port}/v1"
+
+    broker = None
+    if args.broker == "memory":
+        from benchmarks.memory_broker import MemoryBroker
+
+        broker = MemoryBroker()
+        broker.install()
+
+    # importar después de apuntar el cliente al servidor falso y a la base de prueba
+    from app.main import app
+    from app.services import evaluation_consumer, voice_analysis_ai
+    from app.services.job_tracing import summarize
+
+    evaluations = evaluation_consumer.get_collection()
+    await evaluations.database.client.drop_database(BENCH_DB)
+
+    # variantes de audio distintas (distinto hash): la caché de Whisper solo acierta al repetirlas
+    clips = [synth_wav(seconds=args.clip_seconds + i * 0.01) for i in range(args.audio_variants)]
+    backlog = defaultdict(list)
+    stop_sampling = asyncio.Event()
+
+    async with app.router.lifespan_context(app):
+        workers = [
+            asyncio.create_task(voice_analysis_ai.consume(args.worker_concurrency)),
+            asyncio.create_task(evaluation_consumer.consume()),
+        ]
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+            w = Workload(http, clips, rng)
+            seed_rows = [w.user_payload() for _ in range(args.seed_users)]
+            response = await http.post("/users/bulk", json=seed_rows)
+            w.user_ids = [row["id"] for row in response.json()["results"] if row["status"] == "created"]
+            w.seed_users = len(w.user_ids)
+            if not w.user_ids:
+                raise SystemExit(f"Could not seed users: {response.status_code} {response.text[:200]}")
+
+            sampler = asyncio.create_task(sample_backlog(backlog, args.sample_interval, stop_sampling))
+
+            start = time.perf_counter()
+            if args.rate:
+                await open_loop(w, weights, args.rate, args.duration)
+            else:
+                await closed_loop(w, weights, args.concurrency, args.duration)
+            load_seconds = time.perf_counter() - start
+
+            drain_seconds = await wait_for_jobs(evaluations, w.job_ids, args.drain_timeout)
+            stop_sampling.set()
+            await sampler
+            stored = await evaluations.find(
+                {"job_id": {"$in": w.job_ids}}, {"_id": 0, "status": 1, "metadata.lane": 1, "trace.stages": 1}
+            ).to_list(length=None)
+
+        # al cancelarlo, el consumidor vacía su lote y cierra su cliente Mongo
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    if not args.keep_db:
+        await evaluation_consumer.get_collection().database.client.drop_database(BENCH_DB)
+    evaluation_consumer.close_client()
+    await fake.cleanup()
+
+    operations = {}
+    for op in weights:
+        count = sum(w.statuses[op].values())
+        operations[op] = {
+            "count": count,
+            "ok": len(w.samples[op]),
+            "statuses": {str(code): n for code, n in sorted(w.statuses[op].items())},
+            "throughput_per_s": round(count / load_seconds, 1),
+            "latency_ms": percentiles(w.samples[op]),
+        }
+    total = sum(op["count"] for op in operations.values())
+    status_counts = Counter(doc.get("status") for doc in stored)
+    by_lane = defaultdict(list)
+    for doc in stored:
+        if doc.get("trace"):
+            by_lane[(doc.get("metadata") or {}).get("lane", "interactive")].append(doc["trace"]["stages"])
+
+    return {
+        "config": {
+            "mode": f"open_loop@{args.rate}/s" if args.rate else f"closed_loop x{args.concurrency}",
+            "duration_s": args.duration,
+            "mix": weights,
+            "broker": args.broker,
+            "fake_openai": {"latency_s": args.latency, "jitter": args.jitter,
+                            "error_rate": args.error_rate, "rate_limit_rate": args.rate_limit_rate},
+            "worker_concurrency": args.worker_concurrency,
+            "seed_users": w.seed_users,
+            "audio_variants": args.audio_variants,
+        },
+        "load_seconds": round(load_seconds, 2),
+        "throughput_per_s": round(total / load_seconds, 1),
+        "operations": operations,
+        "voice_jobs": {
+            "submitted": len(w.job_ids),
+            "completed": status_counts.get("completed", 0),
+            "failed": status_counts.get("failed", 0),
+            "missing": len(w.job_ids) - len(stored),
+            "drain_seconds": drain_seconds,
+            "stages_ms": summarize([doc["trace"]["stages"] for doc in stored if doc.get("trace")]),
+            "stages_by_lane_ms": {lane: summarize(traces) for lane, traces in sorted(by_lane.items())},
+        },
+        "queues": {name: backlog_summary(backlog[name]) for name in QUEUES},
+        "fake_openai": fake.app["stats"],
+        "broker": broker.stats() if broker else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=20, help="closed-loop clients")
+    parser.add_argument("--rate", type=float, default=0, help="open-loop arrivals per second (overrides --concurrency)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"weighted operations (default: {DEFAULT_MIX})")
+    parser.add_argument("--seed-users", type=int, default=200)
+    parser.add_argument("--audio-variants", type=int, default=50)
+    parser.add_argument("--clip-seconds", type=float, default=5.0)
+    parser.add_argument("--worker-concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=1.0, help="fake OpenAI latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="lognormal sigma of the fake latency")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--broker", choices=("memory", "amqp"), default="memory")
+    parser.add_argument("--mongod", help="start a throwaway mongod from this binary instead of MONGODB_URL")
+    parser.add_argument("--sample-interval", type=float, default=0.5)
+    parser.add_argument("--drain-timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep-db", action="store_true")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    async def main():
+        if args.mongod:
+            async with local_mongod(args.mongod) as url:
+                os.environ["MONGODB_URL"] = url
+                return await run(args)
+        os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+        return await run(args)
+
+    # los workers imprimen por job: la salida estándar queda solo para el informe
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = asyncio.run(main())
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,280 @@
+"""
+In-memory stand-in for the subset of aio-pika the app uses, so the API, the
+voice worker and the evaluation consumer can run in one process without a
+RabbitMQ server.
+
+Covers: connect_robust / connection.channel, set_qos (prefetch per channel),
+declare_queue (also passive, with declaration_result.message_count),
+default_exchange.publish, queue.consume / cancel / iterator, and incoming
+messages with ack / nack / reject / process(). Headers go through the real
+AMQP field-table codec, so they arrive typed exactly as from RabbitMQ.
+
+    broker = MemoryBroker()
+    broker.install()      # aio_pika.connect_robust -> broker.connect
+"""
+import asyncio
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Deque, Dict, Optional
+import aio_pika
+from aio_pika.message import HeaderProxy
+from pamqp import decode, encode
+
+
+class ChannelClosed(Exception):
+    pass
+
+
+class MemoryMessage:
+    """Mensaje entregado a un consumidor (equivalente a IncomingMessage)"""
+
+    def __init__(self, queue: "MemoryQueue", body: bytes, headers: dict, content_type: Optional[str],
+                 redelivered: bool = False):
+        self.queue = queue
+        self.body = body
+        self.headers = headers
+        self.content_type = content_type
+        self.redelivered = redelivered
+        self.channel: Optional["MemoryChannel"] = None
+        self.processed = False
+
+    def _settle(self):
+        if self.processed:
+            raise RuntimeError("Message already processed")
+        self.processed = True
+        self.queue.unacked -= 1
+        self.channel._release()
+
+    async def ack(self):
+        self._settle()
+        self.queue.acked += 1
+
+    async def nack(self, requeue: bool = True):
+        self._settle()
+        if requeue:
+            self.queue._requeue(self)
+        else:
+            self.queue.dead_lettered += 1
+
+    async def reject(self, requeue: bool = False):
+        await self.nack(requeue=requeue)
+
+    @asynccontextmanager
+    async def process(self, requeue: bool = False, ignore_processed: bool = False):
+        # misma semántica que aio-pika: ack al salir, reject(requeue) ante una excepción
+        try:
+            yield self
+        except BaseException:
+            if not self.processed:
+                await self.reject(requeue=requeue)
+            raise
+        else:
+            if not self.processed:
+                await self.ack()
+
+
+class MemoryQueue:
+    def __init__(self, broker: "MemoryBroker", name: str):
+        self.broker = broker
+        self.name = name
+        self.ready: Deque[MemoryMessage] = deque()
+        self.unacked = 0
+        self.published = 0
+        self.acked = 0
+        self.dead_lettered = 0
+        self.consumers: Dict[str, asyncio.Task] = {}
+        self._changed = asyncio.Event()
+
+    def _wake(self):
+        self._changed.set()
+
+    def _put(self, message: MemoryMessage):
+        self.published += 1
+        self.ready.append(message)
+        self._wake()
+
+    def _requeue(self, message: MemoryMessage):
+        self.ready.appendleft(MemoryMessage(self, message.body, message.headers, message.content_type, True))
+        self._wake()
+
+    async def _next(self, channel: "MemoryChannel") -> MemoryMessage:
+        """Espera un mensaje listo y crédito de prefetch en el canal"""
+        while not (self.ready and channel._has_credit()):
+            if channel.closed:
+                raise ChannelClosed(self.name)
+            self._changed.clear()
+            await self._changed.wait()
+        message = self.ready.popleft()
+        message.channel = channel
+        channel._unacked += 1
+        self.unacked += 1
+        if self.ready:
+            # otro consumidor puede tomar el siguiente
+            self._wake()
+        return message
+
+
+class MemoryQueueHandle:
+    """Una cola vista desde el canal que la declaró: el prefetch es por canal"""
+
+    def __init__(self, queue: MemoryQueue, channel: "MemoryChannel"):
+        self.queue = queue
+        self.channel = channel
+        self.name = queue.name
+
+    @property
+    def declaration_result(self):
+        # lo mismo que devuelve un declare pasivo en RabbitMQ: solo cuenta los mensajes listos
+        return SimpleNamespace(message_count=len(self.queue.ready), consumer_count=len(self.queue.consumers))
+
+    async def consume(self, callback, no_ack: bool = False) -> str:
+        tag = f"ctag-{next(self.queue.broker.tags)}"
+
+        async def dispatch():
+            while True:
+                try:
+                    message = await self.queue._next(self.channel)
+                except ChannelClosed:
+                    return
+                if no_ack:
+                    await message.ack()
+                # aio-pika programa el callback como una tarea por mensaje
+                asyncio.ensure_future(callback(message))
+
+        self.queue.consumers[tag] = asyncio.ensure_future(dispatch())
+        return tag
+
+    async def cancel(self, consumer_tag: str):
+        task = self.queue.consumers.pop(consumer_tag, None)
+        if task is not None:
+            task.cancel()
+
+    def iterator(self) -> "MemoryQueueIterator":
+        return MemoryQueueIterator(self.queue, self.channel)
+
+
+class MemoryQueueIterator:
+    def __init__(self, queue: MemoryQueue, channel: "MemoryChannel"):
+        self.queue = queue
+        self.channel = channel
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> MemoryMessage:
+        try:
+            return await self.queue._next(self.channel)
+        except ChannelClosed:
+            raise StopAsyncIteration
+
+
+class MemoryExchange:
+    def __init__(self, broker: "MemoryBroker"):
+        self.broker = broker
+
+    async def publish(self, message: aio_pika.Message, routing_key: str, **kwargs):
+        queue = self.broker.queues.get(routing_key)
+        if queue is None:
+            # igual que el exchange por defecto de RabbitMQ: sin cola, el mensaje se pierde
+            self.broker.unroutable += 1
+            return
+        # ida y vuelta por el codec AMQP y la misma vista que da aio-pika al consumidor
+        _, table = decode.field_table(encode.field_table(message.headers_raw or {}))
+        queue._put(MemoryMessage(queue, bytes(message.body), HeaderProxy(table), message.content_type))
+
+
+class MemoryChannel:
+    def __init__(self, broker: "MemoryBroker"):
+        self.broker = broker
+        self.default_exchange = MemoryExchange(broker)
+        self.prefetch_count = 0
+        self.closed = False
+        self._unacked = 0
+
+    @property
+    def is_closed(self) -> bool:
+        return self.closed
+
+    def _has_credit(self) -> bool:
+        return not self.prefetch_count or self._unacked < self.prefetch_count
+
+    def _release(self):
+        self._unacked -= 1
+        # se liberó crédito: las colas que esperaban prefetch pueden entregar
+        for queue in self.broker.queues.values():
+            queue._wake()
+
+    async def set_qos(self, prefetch_count: int = 0, **kwargs):
+        self.prefetch_count = prefetch_count
+
+    async def declare_queue(self, name: str, durable: bool = False, passive: bool = False,
+                            **kwargs) -> MemoryQueueHandle:
+        queue = self.broker.queues.get(name)
+        if queue is None:
+            if passive:
+                raise aio_pika.exceptions.ChannelNotFoundEntity(f"NOT_FOUND - no queue '{name}'")
+            queue = self.broker.queues[name] = MemoryQueue(self.broker, name)
+        return MemoryQueueHandle(queue, self)
+
+    async def get_queue(self, name: str, ensure: bool = True) -> MemoryQueueHandle:
+        return await self.declare_queue(name, passive=True)
+
+    async def close(self):
+        self.closed = True
+        for queue in self.broker.queues.values():
+            queue._wake()
+
+
+class MemoryConnection:
+    def __init__(self, broker: "MemoryBroker"):
+        self.broker = broker
+        self.channels = []
+
+    async def channel(self, publisher_confirms: bool = True, **kwargs) -> MemoryChannel:
+        channel = MemoryChannel(self.broker)
+        self.channels.append(channel)
+        return channel
+
+    async def close(self):
+        for channel in self.channels:
+            await channel.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class MemoryBroker:
+    def __init__(self):
+        self.queues: Dict[str, MemoryQueue] = {}
+        self.unroutable = 0
+        self.tags = itertools.count(1)
+
+    async def connect(self, url: str = "", **kwargs) -> MemoryConnection:
+        return MemoryConnection(self)
+
+    def install(self):
+        """Reemplaza aio_pika.connect_robust: todo el proceso usa este broker"""
+        aio_pika.connect_robust = self.connect
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                "ready": len(queue.ready),
+                "unacked": queue.unacked,
+                "published": queue.published,
+                "acked": queue.acked,
+                "dead_lettered": queue.dead_lettered,
+            }
+            for name, queue in self.queues.items()
+        }